@@ -1,11 +1,29 @@
 import streamlit as st
 from openai import OpenAI
-import sqlite3
-from fpdf import FPDF
-import base64
-from io import BytesIO
-import re
+from db import get_pool
+from migrations import migrate, USUARIOS_MIGRATIONS
+from ingesta import insertar_finanzas, insertar_usuario
+from ia import PoolTrabajos, PoolSaturado, SingleFlight, clave_plan, iniciar_plan
+from cache_ia import CIFRAS_MONTO, CacheRespuestas, agrupar_monto
+from analisis import analizar_finanzas, nivel_perfil, resumen_analisis
+from moneda import format_currency, parse_currency
+from reportes import CacheReportes
+from estilos import cabecera_html
+from presupuesto import LibroPresupuesto
+import html
+import math
 import os
+from concurrent.futures import wait
+
+# Base de datos local de usuarios y finanzas
+DB_PATH = 'usuarios.db'
+
+# Planes de IA que conserva cada sesión (los más antiguos se descartan)
+MAX_TRABAJOS_SESION = 8
+
+# Cifras significativas de los montos en el prompt del plan: menos cifras comparten más
+# respuestas cacheadas, pero el plan cita montos más lejanos a los del usuario
+CIFRAS_IA = int(os.getenv("IA_CIFRAS_MONTO", CIFRAS_MONTO))
 
 # Configuración inicial de la página DEBE SER LO PRIMERO   
 st.set_page_config(
@@ -19,7 +37,11 @@ st.set_page_config(
 client = None
 if 'OPENAI_API_KEY' in st.secrets:
     try:
-        client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+        client = OpenAI(
+            api_key=st.secrets["OPENAI_API_KEY"],
+            base_url=st.secrets.get("OPENAI_BASE_URL"),  # p. ej. servidor falso local para pruebas
+            timeout=60.0
+        )
         st.session_state['openai_configured'] = True
     except Exception as e:
         st.error(f"Error al configurar OpenAI: {str(e)}")
@@ -28,325 +50,55 @@ else:
     st.warning("Funcionalidad de IA limitada - No se configuró OPENAI_API_KEY")
     st.session_state['openai_configured'] = False
 
-# Estilos CSS personalizados para Investly
+# Estilos CSS y encabezado de Investly (minificados una vez por proceso en estilos.py)
 def load_css():
-    st.markdown("""
-    <style>
-        :root {
-            --azul-oscuro: #1E3A8A;
-            --azul-medio: #2563EB;
-            --azul-claro: #3B82F6;
-            --gris: #6B7280;
-            --blanco: #FFFFFF;
-            --verde: #10B981;
-            --rojo: #EF4444;
-        }
-        
-        .stApp {
-            max-width: 900px;
-            margin: auto;
-            font-family: 'Inter', 'Arial', sans-serif;
-            background-color: #F9FAFB;
-        }
-        
-        .header-container {
-            display: flex;
-            align-items: center;
-            margin-bottom: 20px;
-            justify-content: center;
-            text-align: center;
-        }
-        
-        .logo {
-            height: 70px;
-            margin-right: 15px;
-        }
-        
-        .calculator-container {
-            background-color: white;
-            border-radius: 12px;
-            padding: 25px;
-            box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-            margin-bottom: 25px;
-            border: 1px solid #E5E7EB;
-        }
-        
-        .stButton>button {
-            background-color: var(--azul-medio);
-            color: white;
-            border-radius: 8px;
-            padding: 12px 24px;
-            font-weight: 600;
-            width: 100%;
-            border: none;
-            transition: background-color 0.3s;
-        }
-        
-        .stButton>button:hover {
-            background-color: var(--azul-oscuro);
-            color: white;
-        }
-        
-        .stTextInput>div>div>input, 
-        .stNumberInput>div>div>input,
-        .stSelectbox>div>div>select,
-        .stMultiselect>div>div>div {
-            border-radius: 8px;
-            border: 1px solid #D1D5DB;
-            padding: 10px;
-        }
-        
-        .stMarkdown h1, .stMarkdown h2, .stMarkdown h3 {
-            color: var(--azul-oscuro);
-        }
-        
-        .stMetric {
-            border-left: 4px solid var(--azul-medio);
-            padding-left: 15px;
-            background-color: white;
-            border-radius: 8px;
-            padding: 15px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-        }
-        
-        .positive-value {
-            color: var(--verde);
-            font-weight: bold;
-        }
-        
-        .negative-value {
-            color: var(--rojo);
-            font-weight: bold;
-        }
-        
-        .data-table {
-            width: 100%;
-            margin-bottom: 20px;
-            border-collapse: collapse;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-            border-radius: 8px;
-            overflow: hidden;
-        }
-        
-        .data-table th {
-            background-color: var(--azul-medio);
-            color: white;
-            padding: 12px;
-            text-align: left;
-            font-weight: 600;
-        }
-        
-        .data-table td {
-            border: 1px solid #E5E7EB;
-            padding: 10px;
-            text-align: left;
-        }
-        
-        .data-table tr:nth-child(even) {
-            background-color: #F9FAFB;
-        }
-        
-        .data-table input {
-            width: 100%;
-            padding: 8px;
-            border: 1px solid #D1D5DB;
-            border-radius: 6px;
-        }
-        
-        .data-table .total-row {
-            background-color: #EFF6FF;
-            font-weight: bold;
-        }
-        
-        .tips-container {
-            background-color: #f0f9ff;
-            border-left: 4px solid var(--azul-medio);
-            padding: 20px;
-            margin-bottom: 20px;
-            border-radius: 0 8px 8px 0;
-        }
-        
-        .help-icon {
-            color: var(--azul-medio);
-            cursor: pointer;
-            margin-left: 5px;
-            font-weight: bold;
-        }
-        
-        .help-text {
-            display: none;
-            position: absolute;
-            background-color: white;
-            border: 1px solid var(--gris);
-            padding: 12px;
-            border-radius: 8px;
-            z-index: 100;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-            width: 300px;
-            font-size: 14px;
-        }
-        
-        .help-icon:hover + .help-text {
-            display: block;
-        }
-        
-        .tagline {
-            color: var(--gris);
-            font-style: italic;
-            margin-top: 5px;
-            font-size: 16px;
-        }
-        
-        .investment-card {
-            background: linear-gradient(135deg, #f0f9ff 0%, #e0f2fe 100%);
-            border-radius: 12px;
-            padding: 20px;
-            margin: 15px 0;
-            border-left: 4px solid var(--azul-medio);
-        }
-        
-        @media (max-width: 768px) {
-            .header-container {
-                flex-direction: column;
-                text-align: center;
-            }
-            
-            .logo {
-                margin-right: 0;
-                margin-bottom: 15px;
-            }
-            
-            .help-text {
-                width: 200px;
-                font-size: 12px;
-            }
-        }
-    </style>
-    """, unsafe_allow_html=True)
+    # Con server.enableStaticServing cada rerun envía solo un <link> a la hoja cacheada por el navegador
+    st.markdown(cabecera_html(st.get_option("server.enableStaticServing")), unsafe_allow_html=True)
 
-# Función para formatear números como moneda
-def format_currency(value):
-    return f"${value:,.2f}" if value else "$0.00"
-
-# Función para extraer el valor numérico de un string de moneda
-def parse_currency(currency_str):
-    if not currency_str:
-        return 0.0
-    # Eliminar símbolos de moneda y comas
-    num_str = re.sub(r'[^\d.]', '', currency_str)
-    return float(num_str) if num_str else 0.0
-
-# Función para generar PDF
-def generate_pdf(usuario_data, finanzas_data, analisis_data):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    
-    # Encabezado
-    pdf.set_font("Arial", 'B', 16)
-    pdf.cell(200, 10, txt="Investly - Informe de Análisis Financiero", ln=1, align='C')
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(200, 10, txt="Evaluación de Inversión en Bienes Raíces", ln=1, align='C')
-    pdf.ln(10)
-    
-    # Datos personales
-    pdf.set_font("Arial", 'B', 12)
-    pdf.cell(200, 10, txt="Datos Personales:", ln=1)
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, txt=f"Nombre: {usuario_data.get('nombre', '')}", ln=1)
-    pdf.cell(200, 10, txt=f"Edad: {usuario_data.get('edad', '')}", ln=1)
-    pdf.cell(200, 10, txt=f"Email: {usuario_data.get('email', '')}", ln=1)
-    pdf.ln(5)
-    
-    # Datos financieros
-    pdf.set_font("Arial", 'B', 12)
-    pdf.cell(200, 10, txt="Situación Financiera:", ln=1)
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, txt=f"Ingresos Mensuales: {format_currency(finanzas_data.get('ingresos', 0))}", ln=1)
-    pdf.cell(200, 10, txt=f"Gastos Mensuales: {format_currency(finanzas_data.get('gastos', 0))}", ln=1)
-    pdf.cell(200, 10, txt=f"Activos Totales: {format_currency(finanzas_data.get('activos', 0))}", ln=1)
-    pdf.cell(200, 10, txt=f"Pasivos Totales: {format_currency(finanzas_data.get('pasivos', 0))}", ln=1)
-    pdf.ln(5)
-    
-    # Perfil de inversión
-    if 'perfil_inversion' in analisis_data:
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(200, 10, txt=f"Perfil de Inversión en Bienes Raíces: {analisis_data['perfil_inversion']['nivel']}", ln=1)
-        pdf.set_font("Arial", size=12)
-        pdf.multi_cell(0, 10, txt=analisis_data['perfil_inversion']['descripcion'])
-        pdf.ln(5)
-    
-    # Análisis
-    pdf.set_font("Arial", 'B', 12)
-    pdf.cell(200, 10, txt="Análisis y Recomendaciones:", ln=1)
-    pdf.set_font("Arial", size=12)
-    pdf.multi_cell(0, 10, txt=analisis_data.get('resumen', ''))
-    pdf.ln(5)
-    
-    # Plan de trabajo
-    if 'plan_trabajo' in analisis_data:
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(200, 10, txt="Plan de Trabajo Personalizado:", ln=1)
-        pdf.set_font("Arial", size=12)
-        pdf.multi_cell(0, 10, txt=analisis_data['plan_trabajo'])
-    
-    # Recomendaciones de cursos
-    if 'recomendaciones_cursos' in analisis_data:
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(200, 10, txt="Recomendaciones de Educación Financiera:", ln=1)
-        pdf.set_font("Arial", size=12)
-        pdf.multi_cell(0, 10, txt=analisis_data['recomendaciones_cursos'])
-    
-    # Generar el PDF en memoria
-    pdf_output = BytesIO()
-    pdf.output(pdf_output)
-    pdf_bytes = pdf_output.getvalue()
-    pdf_output.close()
-    
-    return pdf_bytes
+# Caché de reportes PDF compartido por las sesiones del proceso
+@st.cache_resource
+def obtener_cache_reportes():
+    return CacheReportes(max_bytes=64 * 1024 * 1024)
 
-# Crear la base de datos y la tabla de usuarios
+# Crear la base de datos y sus tablas (una sola vez por proceso)
+@st.cache_resource
 def crear_base_datos():
-    conn = sqlite3.connect('usuarios.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT,
-            edad INTEGER,
-            email TEXT,
-            telefono TEXT
-        )
-    ''')
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS finanzas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            usuario_id INTEGER,
-            ingresos_mensuales REAL,
-            gastos_mensuales REAL,
-            activos_totales REAL,
-            pasivos_totales REAL,
-            FOREIGN KEY(usuario_id) REFERENCES usuarios(id)
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    return migrate(DB_PATH, USUARIOS_MIGRATIONS)
 
 # Registrar un nuevo usuario
 def registrar_usuario(nombre, edad, email, telefono):
     if edad < 18:
         st.warning("Debes ser mayor de 18 años para usar este programa.")
         return None
-    conn = sqlite3.connect('usuarios.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO usuarios (nombre, edad, email, telefono)
-        VALUES (?, ?, ?, ?)
-    ''', (nombre, edad, email, telefono))
-    usuario_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return usuario_id
+    with get_pool(DB_PATH).transaction() as conn:
+        return insertar_usuario(conn, nombre, edad, email, telefono)
+
+# Guardar la foto de finanzas usada en cada análisis (la carga masiva usa ingesta.py)
+def guardar_finanzas(usuario_id, ingresos, gastos, activos, pasivos):
+    with get_pool(DB_PATH).transaction() as conn:
+        return insertar_finanzas(conn, usuario_id, ingresos, gastos, activos, pasivos)
+
+# Textos por nivel de perfil para el retiro (los umbrales viven en analisis.py)
+RECOMENDACIONES_RETIRO = {
+    "Alto": (
+        "Tienes un excelente perfil para comenzar a invertir en bienes raíces de inmediato.",
+        "Considera propiedades generadoras de ingresos pasivos como apartamentos en arriendo o locales comerciales.",
+    ),
+    "Medio": (
+        "Tienes potencial para inversión en bienes raíces, pero necesitas mejorar tu flujo de caja.",
+        "Considera comenzar con propiedades pequeñas o co-inversiones.",
+    ),
+    "Bajo": (
+        "Necesitas fortalecer tu situación financiera antes de invertir en bienes raíces.",
+        "Enfócate en aumentar tus ingresos y reducir deudas.",
+    ),
+}
+
+CURSOS_RETIRO = {
+    "Alto": "Curso Avanzado de Inversión en Bienes Raíces",
+    "Medio": "Curso Intermedio de Bienes Raíces",
+    "Bajo": "Curso Básico de Educación Financiera para Bienes Raíces",
+}
 
 # Función para analizar la proyección de retiro con enfoque en bienes raíces
 def analizar_proyeccion_retiro(edad_actual, edad_retiro, ingresos_retiro, gastos_retiro, ahorros_retiro, patrimonio_neto, flujo_caja):
@@ -355,24 +107,9 @@ def analizar_proyeccion_retiro(edad_actual, edad_retiro, ingresos_retiro, gastos
     ahorro_necesario_anual = (necesidad_total - ahorros_retiro) / años_ahorro if años_ahorro > 0 else 0
     
     # Análisis específico para bienes raíces
-    recomendaciones = []
-    cursos_recomendados = []
-    
-    if patrimonio_neto > 50000 and flujo_caja > 1000:
-        nivel = "Alto"
-        recomendaciones.append("Tienes un excelente perfil para comenzar a invertir en bienes raíces de inmediato.")
-        recomendaciones.append("Considera propiedades generadoras de ingresos pasivos como apartamentos en arriendo o locales comerciales.")
-        cursos_recomendados.append("Curso Avanzado de Inversión en Bienes Raíces")
-    elif patrimonio_neto > 20000 and flujo_caja > 500:
-        nivel = "Medio"
-        recomendaciones.append("Tienes potencial para inversión en bienes raíces, pero necesitas mejorar tu flujo de caja.")
-        recomendaciones.append("Considera comenzar con propiedades pequeñas o co-inversiones.")
-        cursos_recomendados.append("Curso Intermedio de Bienes Raíces")
-    else:
-        nivel = "Bajo"
-        recomendaciones.append("Necesitas fortalecer tu situación financiera antes de invertir en bienes raíces.")
-        recomendaciones.append("Enfócate en aumentar tus ingresos y reducir deudas.")
-        cursos_recomendados.append("Curso Básico de Educación Financiera para Bienes Raíces")
+    nivel = nivel_perfil(patrimonio_neto, flujo_caja)
+    recomendaciones = list(RECOMENDACIONES_RETIRO[nivel])
+    cursos_recomendados = [CURSOS_RETIRO[nivel]]
     
     recomendaciones.append("\nTe recomendamos estos recursos educativos:")
     recomendaciones.append("- Portal Educativo de Investly: https://investly.com/cursos")
@@ -400,56 +137,42 @@ def analizar_proyeccion_retiro(edad_actual, edad_retiro, ingresos_retiro, gastos
         """
     }
 
-# Calcular y mostrar el análisis financiero con enfoque en bienes raíces
-def analizar_situacion_financiera(ingresos, gastos, activos, pasivos):
-    flujo_caja_mensual = ingresos - gastos
-    patrimonio_neto = activos - pasivos
-    
-    # Determinar perfil de inversión en bienes raíces
-    if patrimonio_neto > 50000 and flujo_caja_mensual > 1000:
-        perfil = "Alto (70-100%)"
-        descripcion = "Excelente perfil para inversión en bienes raíces. Tienes la capacidad financiera para comenzar a invertir en propiedades generadoras de ingresos pasivos."
-    elif patrimonio_neto > 20000 and flujo_caja_mensual > 500:
-        perfil = "Medio (40-69%)"
-        descripcion = "Buen potencial para inversión en bienes raíces. Considera comenzar con propiedades pequeñas o co-inversiones mientras mejoras tu flujo de caja."
-    else:
-        perfil = "Bajo (0-39%)"
-        descripcion = "Necesitas fortalecer tu situación financiera antes de invertir en bienes raíces. Enfócate en aumentar ingresos, reducir deudas y ahorrar."
-    
+# Mostrar el análisis financiero (solo presentación; el cálculo está en analisis.py)
+def mostrar_analisis_financiero(resultado):
     st.subheader("📊 Análisis Resumen de tu Situación Financiera")
     col1, col2 = st.columns(2)
     
     with col1:
-        st.metric("Ingresos Mensuales", format_currency(ingresos))
-        st.metric("Gastos Mensuales", format_currency(gastos))
-        st.metric("Flujo de Caja Mensual", format_currency(flujo_caja_mensual), 
-                 delta="Positivo" if flujo_caja_mensual > 0 else "Negativo",
-                 delta_color="normal" if flujo_caja_mensual > 0 else "inverse")
+        st.metric("Ingresos Mensuales", format_currency(resultado.ingresos))
+        st.metric("Gastos Mensuales", format_currency(resultado.gastos))
+        st.metric("Flujo de Caja Mensual", format_currency(resultado.flujo_caja), 
+                 delta="Positivo" if resultado.flujo_positivo else "Negativo",
+                 delta_color="normal" if resultado.flujo_positivo else "inverse")
     
     with col2:
-        st.metric("Activos Totales", format_currency(activos))
-        st.metric("Pasivos Totales", format_currency(pasivos))
-        st.metric("Patrimonio Neto", format_currency(patrimonio_neto), 
-                 delta="Positivo" if patrimonio_neto > 0 else "Negativo",
-                 delta_color="normal" if patrimonio_neto > 0 else "inverse")
+        st.metric("Activos Totales", format_currency(resultado.activos))
+        st.metric("Pasivos Totales", format_currency(resultado.pasivos))
+        st.metric("Patrimonio Neto", format_currency(resultado.patrimonio_neto), 
+                 delta="Positivo" if resultado.patrimonio_positivo else "Negativo",
+                 delta_color="normal" if resultado.patrimonio_positivo else "inverse")
     
     st.subheader("🏡 Perfil de Inversión en Bienes Raíces")
     st.markdown(f"""
     <div class="calculator-container">
-        <h4>Nivel: {perfil}</h4>
-        <p>{descripcion}</p>
+        <h4>Nivel: {resultado.perfil}</h4>
+        <p>{resultado.descripcion}</p>
     </div>
     """, unsafe_allow_html=True)
     
     st.subheader("🔍 Análisis Específico para Bienes Raíces")
-    if flujo_caja_mensual > 0:
-        st.success(f"Flujo de caja positivo de {format_currency(flujo_caja_mensual)}/mes. Podrías destinar parte de este excedente a inversión en propiedades.")
+    if resultado.flujo_positivo:
+        st.success(f"Flujo de caja positivo de {format_currency(resultado.flujo_caja)}/mes. Podrías destinar parte de este excedente a inversión en propiedades.")
     else:
-        st.error(f"Flujo de caja negativo de {format_currency(flujo_caja_mensual)}/mes. Necesitas equilibrar tus finanzas antes de considerar inversiones.")
+        st.error(f"Flujo de caja negativo de {format_currency(resultado.flujo_caja)}/mes. Necesitas equilibrar tus finanzas antes de considerar inversiones.")
     
-    if patrimonio_neto > 50000:
+    if resultado.patrimonio_solido:
         st.success("Patrimonio neto sólido. Podrías usar parte como garantía para financiamiento de propiedades.")
-    elif patrimonio_neto > 0:
+    elif resultado.patrimonio_positivo:
         st.warning("Patrimonio neto positivo pero modesto. Considera estrategias de bajo riesgo como alquiler de habitaciones.")
     else:
         st.error("Patrimonio neto negativo. Enfócate en reducir deudas antes de invertir.")
@@ -462,43 +185,47 @@ def analizar_situacion_financiera(ingresos, gastos, activos, pasivos):
     4. **Estudia el mercado local** para identificar oportunidades
     5. **Consulta nuestros recursos educativos** para aprender estrategias específicas
     """)
+
+# Calcular y mostrar el análisis financiero con enfoque en bienes raíces
+def analizar_situacion_financiera(ingresos, gastos, activos, pasivos):
+    resultado = analizar_finanzas(ingresos, gastos, activos, pasivos)
+    mostrar_analisis_financiero(resultado)
     
     return {
-        "flujo_caja": flujo_caja_mensual,
-        "patrimonio": patrimonio_neto,
+        "flujo_caja": resultado.flujo_caja,
+        "patrimonio": resultado.patrimonio_neto,
         "perfil_inversion": {
-            "nivel": perfil,
-            "descripcion": descripcion
+            "nivel": resultado.perfil,
+            "descripcion": resultado.descripcion
         },
-        "resumen": f"""
-        Situación Financiera Actual:
-        - Ingresos Mensuales: {format_currency(ingresos)}
-        - Gastos Mensuales: {format_currency(gastos)}
-        - Flujo de Caja: {format_currency(flujo_caja_mensual)} ({'Positivo' if flujo_caja_mensual > 0 else 'Negativo'})
-        - Activos Totales: {format_currency(activos)}
-        - Pasivos Totales: {format_currency(pasivos)}
-        - Patrimonio Neto: {format_currency(patrimonio_neto)} ({'Positivo' if patrimonio_neto > 0 else 'Negativo'})
-        
-        Perfil de Inversión en Bienes Raíces: {perfil}
-        {descripcion}
-        
-        Análisis:
-        {'Tienes un flujo de caja positivo que podrías destinar a inversión en propiedades.' if flujo_caja_mensual > 0 else 'Necesitas equilibrar tu flujo de caja antes de considerar inversiones.'}
-        {'Tu patrimonio neto es sólido y podrías usarlo como garantía para financiamiento.' if patrimonio_neto > 50000 else 'Considera fortalecer tu patrimonio antes de inversiones significativas.'}
-        """
+        "resumen": resumen_analisis(resultado)
     }
 
-# Generar plan de trabajo financiero con enfoque en bienes raíces
-def generar_plan_trabajo(ingresos, gastos, activos, pasivos):
-    if not st.session_state.get('openai_configured', False):
-        return "Servicio de IA no disponible en este momento. Por favor configura tu clave de OpenAI API en secrets.toml para habilitar esta función."
-    
-    prompt = f"""
+# Pool de trabajos de IA compartido por todas las sesiones del proceso
+@st.cache_resource
+def obtener_pool_ia():
+    return PoolTrabajos(max_workers=4, max_pendientes=16)
+
+# Registro de planes en curso para no repetir la misma llamada a OpenAI
+@st.cache_resource
+def obtener_vuelos_ia():
+    return SingleFlight()
+
+# Caché persistente de planes generados, compartido entre sesiones y reinicios
+@st.cache_resource
+def obtener_cache_ia():
+    return CacheRespuestas('cache_ia.db', ttl=7 * 24 * 3600, max_entradas=5000)
+
+# Prompt del plan de trabajo financiero con enfoque en bienes raíces
+def prompt_plan_trabajo(ingresos, gastos, activos, pasivos, flujo_caja, patrimonio_neto):
+    return f"""
     Como experto en bienes raíces y finanzas personales, analiza esta situación financiera:
     - Ingresos: {format_currency(ingresos)}/mes
     - Gastos: {format_currency(gastos)}/mes
+    - Flujo de caja: {format_currency(flujo_caja)}/mes
     - Activos: {format_currency(activos)}
     - Pasivos: {format_currency(pasivos)}
+    - Patrimonio neto: {format_currency(patrimonio_neto)}
     
     Crea un plan detallado orientado específicamente a inversión en bienes raíces que incluya:
     1. Diagnóstico claro de la situación actual con enfoque en bienes raíces
@@ -512,22 +239,129 @@ def generar_plan_trabajo(ingresos, gastos, activos, pasivos):
     Usa un lenguaje claro y motivador, con ejemplos concretos de estrategias inmobiliarias.
     Respuesta en español.
     """
+
+# Lanzar el plan en segundo plano y guardar el handle en la sesión
+def enviar_plan_trabajo(ingresos, gastos, activos, pasivos):
+    # Montos agrupados por rango para que perfiles similares compartan el plan cacheado; flujo
+    # y patrimonio se calculan con los montos exactos para que un flujo pequeño no quede en cero
+    montos = (ingresos, gastos, activos, pasivos, ingresos - gastos, activos - pasivos)
+    prompt = prompt_plan_trabajo(*(agrupar_monto(v, CIFRAS_IA) for v in montos))
+    clave = clave_plan(prompt)
+    trabajos = st.session_state.setdefault('trabajos_ia', {})
+    trabajo = trabajos.get(clave)
+    # Mismos datos en la sesión: se reutiliza el trabajo en curso o el ya completado
+    if trabajo is None or (trabajo.done() and trabajo.futuro.exception() is not None):
+        # Solicitudes idénticas de otras sesiones comparten la llamada en curso
+        trabajo = obtener_vuelos_ia().hacer(
+            clave, lambda: iniciar_plan(obtener_pool_ia(), client, prompt, cache=obtener_cache_ia())
+        )
+        trabajos.pop(clave, None)
+        trabajos[clave] = trabajo
+        while len(trabajos) > MAX_TRABAJOS_SESION:
+            trabajos.pop(next(iter(trabajos)))
+    return trabajo
+
+# Mostrar los tokens a medida que llegan sin bloquear la sesión hasta que termine
+def esperar_plan_trabajo(trabajo):
+    if trabajo.done():
+        return trabajo.futuro.result()
+    salida = st.empty()
+    salida.info("⏳ Generando tu plan personalizado para bienes raíces...")
+    mostrado = 0
+    while not trabajo.done():
+        parcial = trabajo.texto()
+        if len(parcial) > mostrado:
+            salida.markdown(parcial + " ▌")
+            mostrado = len(parcial)
+        wait([trabajo.futuro], timeout=0.1)
+    salida.empty()
+    return trabajo.futuro.result()
+
+# Generar plan de trabajo financiero con enfoque en bienes raíces
+def generar_plan_trabajo(ingresos, gastos, activos, pasivos):
+    if not st.session_state.get('openai_configured', False):
+        return "Servicio de IA no disponible en este momento. Por favor configura tu clave de OpenAI API en secrets.toml para habilitar esta función."
     
     try:
-        with st.spinner('Generando tu plan personalizado para bienes raíces...'):
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Eres un asesor experto en inversión en bienes raíces. Responde en español con enfoque práctico para inversión inmobiliaria."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7
-            )
-        return response.choices[0].message.content
+        trabajo = enviar_plan_trabajo(ingresos, gastos, activos, pasivos)
+        return esperar_plan_trabajo(trabajo)
+    except PoolSaturado as e:
+        st.warning(str(e))
+        return "No se pudo generar el plan en este momento."
     except Exception as e:
         st.error(f"Error al generar el plan: {str(e)}")
         return "No se pudo generar el plan en este momento."
 
+# Tablas de presupuesto como formularios: escribir en un campo no vuelve a ejecutar el script
+# y al enviar una tabla solo se leen sus campos y se recalculan sus totales
+def actualizar_tabla(tabla, prefijo):
+    # Solo las partidas que cambiaron ajustan los totales del libro (delta O(1) por partida)
+    libro = st.session_state[tabla]
+    for nombre in libro:
+        for campo in libro.campos:
+            clave = f"{prefijo}_{campo}_{nombre}"
+            monto = parse_currency(st.session_state[clave], estricto=True)
+            if monto is not None and math.isfinite(monto):
+                libro.actualizar(nombre, campo, monto)
+            else:
+                # Texto que no es un monto ("1.2.3,4") o fuera de rango: el campo vuelve al monto anterior
+                st.session_state[clave] = format_currency(libro.monto(nombre, campo))
+
+def agregar_partida(tabla, prefijo):
+    libro = st.session_state[tabla]
+    nombre = st.session_state[f"{prefijo}_nueva"].strip()
+    if nombre and nombre not in libro:
+        libro.agregar(nombre, "Partida agregada por ti")
+
+def formulario_tabla(titulo, tabla, prefijo):
+    """Tabla editable en un st.form a partir de su LibroPresupuesto; devuelve los totales del libro"""
+    libro = st.session_state[tabla]
+    con_deuda = "deuda" in libro.campos
+    
+    st.markdown(f"<h4>{titulo}</h4>", unsafe_allow_html=True)
+    with st.form(f"form_{tabla}"):
+        if con_deuda:
+            # Encabezados de tabla
+            cols = st.columns([3, 1, 1, 1])
+            cols[0].markdown("<b>Descripción</b>", unsafe_allow_html=True)
+            cols[1].markdown("<b>Valor ($)</b>", unsafe_allow_html=True)
+            cols[2].markdown("<b>Deuda ($)</b>", unsafe_allow_html=True)
+            cols[3].markdown("<b>Activo Neto ($)</b>", unsafe_allow_html=True)
+        
+        for nombre, ayuda in libro.partidas():
+            cols = st.columns([3, 1, 1, 1] if con_deuda else [4, 1])
+            
+            # Descripción con tooltip
+            with cols[0]:
+                st.markdown(f"{html.escape(nombre)} <span class='help-icon'>?<span class='help-text'>{html.escape(ayuda)}</span></span>", unsafe_allow_html=True)
+            
+            for col, campo in zip(cols[1:], libro.campos):
+                col.text_input(
+                    f"{campo.capitalize()} {nombre}" if con_deuda else f"{nombre} ($)",
+                    value=format_currency(libro.monto(nombre, campo)),
+                    key=f"{prefijo}_{campo}_{nombre}",
+                    label_visibility="collapsed"
+                )
+            
+            # Activo neto con los últimos valores enviados
+            if con_deuda:
+                cols[3].markdown(f"<div style='padding: 0.5rem;'>{format_currency(libro.neto(nombre))}</div>", unsafe_allow_html=True)
+        
+        st.form_submit_button(f"Actualizar {titulo.lower()}", on_click=actualizar_tabla, args=(tabla, prefijo))
+    
+    # Partidas propias del usuario
+    with st.form(f"form_{tabla}_nueva", clear_on_submit=True):
+        cols = st.columns([4, 1])
+        cols[0].text_input(
+            f"Nueva partida de {titulo.lower()}",
+            key=f"{prefijo}_nueva",
+            placeholder=f"Nueva partida de {titulo.lower()}",
+            label_visibility="collapsed"
+        )
+        cols[1].form_submit_button("➕ Agregar", on_click=agregar_partida, args=(tabla, prefijo))
+    
+    return libro.totales()
+
 # Función para crear tooltip de ayuda
 def help_tooltip(text):
     st.markdown(f"""
@@ -538,24 +372,7 @@ def help_tooltip(text):
 
 # Interfaz principal de Streamlit
 def main():
-    load_css()  # Cargar estilos CSS personalizados
-    
-    # Encabezado con logo
-    st.markdown("""
-    <div class="header-container">
-        <div>
-            <h1 style="margin:0;color:#1E3A8A;">Investly</h1>
-            <p class="tagline">Tu perfil. Tu estrategia. Tu patrimonio.</p>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    st.markdown("""
-    <div class="calculator-container">
-        Esta herramienta te ayudará a analizar tu capacidad para invertir en bienes raíces, 
-        crear un plan de acción y establecer metas claras para construir patrimonio inmobiliario.
-    </div>
-    """, unsafe_allow_html=True)
+    load_css()  # Cargar estilos CSS personalizados y encabezado con logo
     
     # Inicializar variables de sesión para el reporte
     if 'reporte_data' not in st.session_state:
@@ -628,115 +445,19 @@ def main():
             
             # Inicializar valores en session_state si no existen
             if 'activos_values' not in st.session_state:
-                st.session_state['activos_values'] = {item['nombre']: {"valor": 0.0, "deuda": 0.0} for item in activos_items}
+                st.session_state['activos_values'] = LibroPresupuesto(
+                    [(item['nombre'], item['help']) for item in activos_items], campos=("valor", "deuda")
+                )
             
             if 'pasivos_values' not in st.session_state:
-                st.session_state['pasivos_values'] = {item['nombre']: {"valor": 0.0, "deuda": 0.0} for item in pasivos_items}
-            
-            # Tabla de activos
-            st.markdown("<h4>Activos</h4>", unsafe_allow_html=True)
-            
-            # Encabezados de tabla
-            cols = st.columns([3, 1, 1, 1])
-            cols[0].markdown("<b>Descripción</b>", unsafe_allow_html=True)
-            cols[1].markdown("<b>Valor ($)</b>", unsafe_allow_html=True)
-            cols[2].markdown("<b>Deuda ($)</b>", unsafe_allow_html=True)
-            cols[3].markdown("<b>Activo Neto ($)</b>", unsafe_allow_html=True)
-            
-            activos_total = {"valor": 0.0, "deuda": 0.0, "neto": 0.0}
-            
-            for item in activos_items:
-                cols = st.columns([3, 1, 1, 1])
-                
-                # Descripción con tooltip
-                with cols[0]:
-                    st.markdown(f"{item['nombre']} <span class='help-icon'>?<span class='help-text'>{item['help']}</span></span>", unsafe_allow_html=True)
-                
-                # Campos de valor y deuda
-                valor = cols[1].text_input(
-                    f"Valor {item['nombre']}",
-                    value=format_currency(st.session_state['activos_values'][item['nombre']]['valor']),
-                    key=f"activo_valor_{item['nombre']}",
-                    label_visibility="collapsed"
-                )
-                
-                deuda = cols[2].text_input(
-                    f"Deuda {item['nombre']}",
-                    value=format_currency(st.session_state['activos_values'][item['nombre']]['deuda']),
-                    key=f"activo_deuda_{item['nombre']}",
-                    label_visibility="collapsed"
+                # Neto negativo porque son pasivos
+                st.session_state['pasivos_values'] = LibroPresupuesto(
+                    [(item['nombre'], item['help']) for item in pasivos_items], campos=("valor", "deuda"), signo=-1
                 )
-                
-                # Calcular activo neto
-                valor_parsed = parse_currency(valor)
-                deuda_parsed = parse_currency(deuda)
-                neto = valor_parsed - deuda_parsed
-                
-                # Mostrar activo neto
-                cols[3].markdown(f"<div style='padding: 0.5rem;'>{format_currency(neto)}</div>", unsafe_allow_html=True)
-                
-                # Actualizar session state y totales
-                st.session_state['activos_values'][item['nombre']] = {
-                    "valor": valor_parsed,
-                    "deuda": deuda_parsed
-                }
-                
-                activos_total["valor"] += valor_parsed
-                activos_total["deuda"] += deuda_parsed
-                activos_total["neto"] += neto
-            
-            # Tabla de pasivos
-            st.markdown("<h4>Pasivos</h4>", unsafe_allow_html=True)
-            
-            # Encabezados de tabla
-            cols = st.columns([3, 1, 1, 1])
-            cols[0].markdown("<b>Descripción</b>", unsafe_allow_html=True)
-            cols[1].markdown("<b>Valor ($)</b>", unsafe_allow_html=True)
-            cols[2].markdown("<b>Deuda ($)</b>", unsafe_allow_html=True)
-            cols[3].markdown("<b>Activo Neto ($)</b>", unsafe_allow_html=True)
             
-            pasivos_total = {"valor": 0.0, "deuda": 0.0, "neto": 0.0}
-            
-            for item in pasivos_items:
-                cols = st.columns([3, 1, 1, 1])
-                
-                # Descripción con tooltip
-                with cols[0]:
-                    st.markdown(f"{item['nombre']} <span class='help-icon'>?<span class='help-text'>{item['help']}</span></span>", unsafe_allow_html=True)
-                
-                # Campos de valor y deuda (para pasivos, valor es el monto total de la deuda)
-                valor = cols[1].text_input(
-                    f"Valor {item['nombre']}",
-                    value=format_currency(st.session_state['pasivos_values'][item['nombre']]['valor']),
-                    key=f"pasivo_valor_{item['nombre']}",
-                    label_visibility="collapsed"
-                )
-                
-                # Para pasivos, la "deuda" sería el saldo pendiente (podría ser igual al valor)
-                deuda = cols[2].text_input(
-                    f"Deuda {item['nombre']}",
-                    value=format_currency(st.session_state['pasivos_values'][item['nombre']]['deuda']),
-                    key=f"pasivo_deuda_{item['nombre']}",
-                    label_visibility="collapsed"
-                )
-                
-                # Calcular activo neto (para pasivos sería negativo)
-                valor_parsed = parse_currency(valor)
-                deuda_parsed = parse_currency(deuda)
-                neto = -(valor_parsed - deuda_parsed)  # Negativo porque son pasivos
-                
-                # Mostrar activo neto
-                cols[3].markdown(f"<div style='padding: 0.5rem;'>{format_currency(neto)}</div>", unsafe_allow_html=True)
-                
-                # Actualizar session state y totales
-                st.session_state['pasivos_values'][item['nombre']] = {
-                    "valor": valor_parsed,
-                    "deuda": deuda_parsed
-                }
-                
-                pasivos_total["valor"] += valor_parsed
-                pasivos_total["deuda"] += deuda_parsed
-                pasivos_total["neto"] += neto
+            # Tablas de activos y pasivos
+            activos_total = formulario_tabla("Activos", 'activos_values', "activo")
+            pasivos_total = formulario_tabla("Pasivos", 'pasivos_values', "pasivo")
             
             # Mostrar totales
             st.markdown(f"""
@@ -784,63 +505,29 @@ def main():
             
             # Inicializar valores en session_state si no existen
             if 'ingresos_values' not in st.session_state:
-                st.session_state['ingresos_values'] = {
-                    "Ingresos mensuales adulto 1": {"valor": 0.0, "help": "Salario, honorarios o ingresos principales del primer adulto en el hogar"},
-                    "Ingresos mensuales adulto 2": {"valor": 0.0, "help": "Salario, honorarios o ingresos principales del segundo adulto en el hogar (si aplica)"},
-                    "Otros ingresos": {"valor": 0.0, "help": "Ingresos adicionales como arriendos, inversiones, negocios secundarios"}
-                }
+                st.session_state['ingresos_values'] = LibroPresupuesto([
+                    ("Ingresos mensuales adulto 1", "Salario, honorarios o ingresos principales del primer adulto en el hogar"),
+                    ("Ingresos mensuales adulto 2", "Salario, honorarios o ingresos principales del segundo adulto en el hogar (si aplica)"),
+                    ("Otros ingresos", "Ingresos adicionales como arriendos, inversiones, negocios secundarios")
+                ])
             
             if 'gastos_values' not in st.session_state:
-                st.session_state['gastos_values'] = {
-                    "Gasto de Inmueble 1": {"valor": 0.0, "help": "Hipoteca, administración, impuestos y mantenimiento de tu vivienda principal"},
-                    "Gasto de Inmueble 2": {"valor": 0.0, "help": "Hipoteca, administración, impuestos y mantenimiento de tu segunda propiedad (si aplica)"},
-                    "Alimentación": {"valor": 0.0, "help": "Supermercado, restaurantes y gastos de comida en general"},
-                    "Educación": {"valor": 0.0, "help": "Colegiatura, universidad, cursos y materiales educativos"},
-                    "Transporte": {"valor": 0.0, "help": "Gasolina, transporte público, mantenimiento vehicular"},
-                    "Salud": {"valor": 0.0, "help": "Seguros médicos, medicinas, consultas"},
-                    "Entretenimiento": {"valor": 0.0, "help": "Salidas, viajes, suscripciones (Netflix, etc.)"},
-                    "Servicios públicos": {"valor": 0.0, "help": "Agua, luz, gas, internet, teléfono"},
-                    "Seguros": {"valor": 0.0, "help": "Seguro de vida, vehicular, hogar"},
-                    "Otros gastos": {"valor": 0.0, "help": "Cualquier otro gasto no clasificado"}
-                }
-            
-            # Ingresos
-            st.markdown("<h4>Ingresos</h4>", unsafe_allow_html=True)
-            ingresos_total = 0.0
-            
-            for item, data in st.session_state['ingresos_values'].items():
-                cols = st.columns([4, 1])
-                with cols[0]:
-                    st.markdown(f"{item} <span class='help-icon'>?<span class='help-text'>{data['help']}</span></span>", unsafe_allow_html=True)
-                
-                value = cols[1].text_input(
-                    f"{item} ($)",
-                    value=format_currency(data['valor']),
-                    key=f"ingreso_{item}",
-                    label_visibility="collapsed"
-                )
-                parsed_value = parse_currency(value)
-                st.session_state['ingresos_values'][item]['valor'] = parsed_value
-                ingresos_total += parsed_value
-            
-            # Gastos
-            st.markdown("<h4>Gastos</h4>", unsafe_allow_html=True)
-            gastos_total = 0.0
-            
-            for item, data in st.session_state['gastos_values'].items():
-                cols = st.columns([4, 1])
-                with cols[0]:
-                    st.markdown(f"{item} <span class='help-icon'>?<span class='help-text'>{data['help']}</span></span>", unsafe_allow_html=True)
-                
-                value = cols[1].text_input(
-                    f"{item} ($)",
-                    value=format_currency(data['valor']),
-                    key=f"gasto_{item}",
-                    label_visibility="collapsed"
-                )
-                parsed_value = parse_currency(value)
-                st.session_state['gastos_values'][item]['valor'] = parsed_value
-                gastos_total += parsed_value
+                st.session_state['gastos_values'] = LibroPresupuesto([
+                    ("Gasto de Inmueble 1", "Hipoteca, administración, impuestos y mantenimiento de tu vivienda principal"),
+                    ("Gasto de Inmueble 2", "Hipoteca, administración, impuestos y mantenimiento de tu segunda propiedad (si aplica)"),
+                    ("Alimentación", "Supermercado, restaurantes y gastos de comida en general"),
+                    ("Educación", "Colegiatura, universidad, cursos y materiales educativos"),
+                    ("Transporte", "Gasolina, transporte público, mantenimiento vehicular"),
+                    ("Salud", "Seguros médicos, medicinas, consultas"),
+                    ("Entretenimiento", "Salidas, viajes, suscripciones (Netflix, etc.)"),
+                    ("Servicios públicos", "Agua, luz, gas, internet, teléfono"),
+                    ("Seguros", "Seguro de vida, vehicular, hogar"),
+                    ("Otros gastos", "Cualquier otro gasto no clasificado")
+                ])
+            
+            # Ingresos y gastos
+            ingresos_total = formulario_tabla("Ingresos", 'ingresos_values', "ingreso")["valor"]
+            gastos_total = formulario_tabla("Gastos", 'gastos_values', "gasto")["valor"]
             
             # Calcular saldo mensual
             saldo_mensual = ingresos_total - gastos_total
@@ -876,6 +563,7 @@ def main():
                 total_activos_netos = activos_total['neto'] + pasivos_total['neto']
                 
                 st.session_state['datos_financieros'] = (ingresos_total, gastos_total, total_activos_netos, abs(pasivos_total['neto']))
+                guardar_finanzas(st.session_state['usuario_id'], *st.session_state['datos_financieros'])
                 analisis = analizar_situacion_financiera(ingresos_total, gastos_total, total_activos_netos, abs(pasivos_total['neto']))
                 st.session_state['reporte_data']['finanzas'] = {
                     'ingresos': ingresos_total,
@@ -887,8 +575,8 @@ def main():
                 st.session_state['reporte_data']['analisis']['perfil_inversion'] = analisis['perfil_inversion']
                 
                 # Generar y mostrar plan de trabajo específico para bienes raíces
-                plan = generar_plan_trabajo(ingresos_total, gastos_total, total_activos_netos, abs(pasivos_total['neto']))
                 st.subheader("📝 Plan de Trabajo para Inversión en Bienes Raíces")
+                plan = generar_plan_trabajo(ingresos_total, gastos_total, total_activos_netos, abs(pasivos_total['neto']))
                 st.write(plan)
                 st.session_state['reporte_data']['analisis']['plan_trabajo'] = plan
                 
@@ -978,9 +666,9 @@ def main():
             if st.button("Generar estrategia personalizada"):
                 st.session_state['plan_inversion'] = (objetivos, horizonte, ", ".join(estrategias))
                 ingresos, gastos, activos, pasivos = st.session_state['datos_financieros']
-                analisis_ia = generar_plan_trabajo(ingresos, gastos, activos, pasivos)
                 
                 st.subheader("🧠 Estrategia Personalizada con IA")
+                analisis_ia = generar_plan_trabajo(ingresos, gastos, activos, pasivos)
                 st.write(analisis_ia)
                 st.session_state['reporte_data']['analisis']['analisis_ia'] = analisis_ia
     
@@ -1032,7 +720,8 @@ def main():
     # Botón para descargar PDF
     if 'reporte_data' in st.session_state and st.session_state['reporte_data']['usuario']:
         if st.button("📄 Descargar Reporte Completo en PDF"):
-            pdf_bytes = generate_pdf(
+            # Un reporte sin cambios se sirve desde el caché sin volver a generarlo
+            pdf_bytes = obtener_cache_reportes().obtener(
                 st.session_state['reporte_data']['usuario'],
                 st.session_state['reporte_data']['finanzas'],
                 st.session_state['reporte_data']['analisis']
@@ -1040,10 +729,13 @@ def main():
             
             st.success("Reporte generado con éxito!")
             
-            # Crear enlace de descarga
-            b64 = base64.b64encode(pdf_bytes).decode()
-            href = f'<a href="data:application/octet-stream;base64,{b64}" download="reporte_investly.pdf">Haz clic aquí para descargar tu reporte</a>'
-            st.markdown(href, unsafe_allow_html=True)
+            # Descarga por HTTP en lugar de incrustar el PDF en base64
+            st.download_button(
+                "Haz clic aquí para descargar tu reporte",
+                data=pdf_bytes,
+                file_name="reporte_investly.pdf",
+                mime="application/pdf"
+            )
     
     # Pie de página
     st.markdown("---")
@@ -1,7 +1,12 @@
 import streamlit as st
-import sqlite3
-import stripe
-from datetime import datetime
+from db import get_pool
+from migrations import migrate, INVESTLY_MIGRATIONS
+from suscripciones import CacheSuscripciones, iniciar_webhook
+from pagos import CacheCheckout, ClienteStripe
+from evaluaciones import guardar_evaluacion, pagina_evaluaciones
+from escenarios import (HORIZONTE_MESES, NIVELES, TASA_DEUDA, conteo_niveles, evaluar_escenarios,
+                        mejores_escenarios, menor_cambio, rango_porcentual)
+from moneda import format_currency
 import supabase
 import json
 import os
@@ -25,6 +30,8 @@ if 'show_upgrade' not in st.session_state:
     st.session_state.show_upgrade = False
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
+if 'historial_cursores' not in st.session_state:
+    st.session_state.historial_cursores = [None]
 
 # Configuración desde variables de entorno
 SUPABASE_URL = os.getenv("SUPABASE_URL", "https://embmafaufiiuzwfosdfk.supabase.co")
@@ -39,6 +46,9 @@ STRIPE_CONFIG = {
     "cancel_url": os.getenv("CANCEL_URL", "http://localhost:8501/")
 }
 
+# Crear la sesión de checkout en segundo plano al mostrar la página de pago (STRIPE_PRECARGAR_CHECKOUT=0 la desactiva)
+PRECARGAR_CHECKOUT = os.getenv("STRIPE_PRECARGAR_CHECKOUT", "1") != "0"
+
 # Inicializar Supabase
 def init_supabase():
     try:
@@ -48,78 +58,70 @@ def init_supabase():
         return None
 
 # Funciones de base de datos
+DB_PATH = 'investly.db'
+
 def init_db():
     """Inicializar la base de datos SQLite"""
     try:
-        conn = sqlite3.connect('investly.db')
-        c = conn.cursor()
-        
-        # Crear tabla de usuarios si no existe
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                email TEXT PRIMARY KEY,
-                subscription_status BOOLEAN DEFAULT FALSE,
-                subscription_end DATE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Crear tabla de evaluaciones si no existe
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS evaluations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_email TEXT,
-                evaluation_data TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_email) REFERENCES users (email)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        migrate_db()
         return True
     except Exception as e:
         st.error(f"Error inicializando base de datos: {str(e)}")
         return False
 
+@st.cache_resource
+def migrate_db():
+    """Aplicar migraciones pendientes una sola vez por proceso"""
+    return migrate(DB_PATH, INVESTLY_MIGRATIONS)
+
 def save_user_data(user_email):
     """Guardar datos del usuario en la base de datos"""
     try:
-        conn = sqlite3.connect('investly.db')
-        c = conn.cursor()
-        
-        # Insertar usuario si no existe
-        c.execute('''
-            INSERT OR IGNORE INTO users (email) VALUES (?)
-        ''', (user_email,))
-        
-        conn.commit()
-        conn.close()
+        with get_pool(DB_PATH).transaction() as conn:
+            # Insertar usuario si no existe
+            conn.execute('''
+                INSERT OR IGNORE INTO users (email) VALUES (?)
+            ''', (user_email,))
         return True
     except Exception as e:
         st.error(f"Error guardando datos de usuario: {str(e)}")
         return False
 
-def get_user_subscription_status(user_email):
-    """Obtener estado de suscripción del usuario"""
+def save_evaluation(user_email, evaluation):
+    """Guardar una evaluación en el historial del usuario"""
     try:
-        conn = sqlite3.connect('investly.db')
-        c = conn.cursor()
-        
-        c.execute('''
-            SELECT subscription_status, subscription_end 
-            FROM users 
-            WHERE email = ?
-        ''', (user_email,))
-        
-        result = c.fetchone()
-        conn.close()
-        
-        if result and result[0]:
-            # Verificar si la suscripción no ha expirado
-            if result[1] and datetime.strptime(result[1], '%Y-%m-%d') > datetime.now():
-                return True
+        guardar_evaluacion(DB_PATH, user_email, evaluation)
+        # La próxima vista del historial empieza por la evaluación recién guardada
+        st.session_state.historial_cursores = [None]
+        return True
+    except Exception as e:
+        st.error(f"Error guardando evaluación: {str(e)}")
         return False
+
+@st.cache_resource
+def obtener_suscripciones():
+    """Caché de suscripciones del proceso"""
+    return CacheSuscripciones(DB_PATH)
+
+@st.cache_resource
+def iniciar_receptor_webhook():
+    """Receptor de webhooks de Stripe, una vez por proceso y solo con STRIPE_WEBHOOK_SECRET
+
+    Si el puerto está ocupado devuelve None y la app sigue igual: nunca afecta el estado Pro.
+    """
+    secreto = os.getenv("STRIPE_WEBHOOK_SECRET")
+    if not secreto:
+        return None
+    return iniciar_webhook(
+        DB_PATH, secreto, obtener_suscripciones(),
+        port=int(os.getenv("STRIPE_WEBHOOK_PORT", "8790")),
+        checkouts=obtener_checkouts()
+    )
+
+def get_user_subscription_status(user_email):
+    """Obtener estado de suscripción del usuario (caché con TTL, invalidado por los webhooks de Stripe)"""
+    try:
+        return obtener_suscripciones().esta_activa(user_email)
     except:
         return False
 
@@ -145,6 +147,8 @@ def authenticate_user():
                 # Por ahora usamos una verificación simple para demo
                 st.session_state.user = {"email": email}
                 st.session_state.authenticated = True
+                # El historial siempre empieza por la primera página del usuario que entra
+                st.session_state.historial_cursores = [None]
                 st.rerun()
             else:
                 st.error("Por favor, completa todos los campos")
@@ -174,33 +178,41 @@ def check_subscription_status(user_email):
     """Verificar el estado de suscripción del usuario"""
     return get_user_subscription_status(user_email)
 
+@st.cache_resource
+def obtener_cliente_stripe():
+    """Cliente de Stripe del proceso: conexión keep-alive, timeouts, reintentos y pool de hilos compartidos"""
+    return ClienteStripe(STRIPE_CONFIG["api_key"])
+
+@st.cache_resource
+def obtener_checkouts():
+    """Sesiones de checkout por email, compartidas entre sesiones de Streamlit hasta que vencen"""
+    return CacheCheckout(
+        obtener_cliente_stripe(),
+        STRIPE_CONFIG["price_id"],
+        STRIPE_CONFIG["success_url"],
+        STRIPE_CONFIG["cancel_url"]
+    )
+
+def prefetch_checkout_session(user_email):
+    """Encolar la sesión de checkout del usuario para que la URL esté lista al hacer clic"""
+    if PRECARGAR_CHECKOUT:
+        obtener_checkouts().precargar(user_email)
+
 def create_checkout_session(user_email):
-    """Crear sesión de checkout de Stripe"""
+    """URL de checkout de Stripe: la precargada si existe; si no, se crea fuera del hilo de Streamlit"""
     try:
-        stripe.api_key = STRIPE_CONFIG["api_key"]
-        
-        session = stripe.checkout.Session.create(
-            payment_method_types=['card'],
-            line_items=[{
-                'price': STRIPE_CONFIG["price_id"],
-                'quantity': 1,
-            }],
-            mode='subscription',
-            customer_email=user_email,
-            success_url=STRIPE_CONFIG["success_url"] + "?session_id={CHECKOUT_SESSION_ID}",
-            cancel_url=STRIPE_CONFIG["cancel_url"],
-            metadata={
-                "user_email": user_email
-            }
-        )
-        return session.url
+        with st.spinner("Preparando pago seguro..."):
+            return obtener_checkouts().url(user_email)
     except Exception as e:
+        obtener_checkouts().invalidar(user_email)
         st.error(f"Error al procesar pago: {str(e)}")
         return None
 
 def show_pro_upgrade_ui():
     """Mostrar interfaz para actualizar a Pro"""
     st.session_state.show_upgrade = True
+    if st.session_state.get('user'):
+        prefetch_checkout_session(st.session_state.user['email'])
 
 # Funciones de UI
 def show_pro_features_sidebar():
@@ -234,6 +246,11 @@ def show_free_dashboard():
         
         submitted = st.form_submit_button("Generar Reporte Básico")
         if submitted:
+            save_evaluation(st.session_state.user['email'], {
+                "plan": "free",
+                "monto": investment_amount,
+                "riesgo": risk_tolerance
+            })
             st.success("Reporte básico generado exitosamente")
     
     # Mostrar opción para mejorar
@@ -268,13 +285,113 @@ def show_pro_dashboard():
         
         submitted = st.form_submit_button("Generar Reporte Premium")
         if submitted:
+            save_evaluation(st.session_state.user['email'], {
+                "plan": "pro",
+                "monto": investment_amount,
+                "riesgo": risk_tolerance,
+                "objetivo": investment_goal
+            })
             st.success("Reporte premium generado con análisis avanzado y gráficos personalizados")
+    
+    show_scenario_comparison()
+    show_evaluation_history(st.session_state.user['email'])
+
+def scenario_row(escenario, meses):
+    """Fila legible de un escenario para la tabla de comparación"""
+    return {
+        "Ingresos": f"{escenario['variacion_ingreso']:+.0%}" if escenario['variacion_ingreso'] else "0%",
+        "Gastos": f"{-escenario['recorte_gasto']:+.0%}" if escenario['recorte_gasto'] else "0%",
+        "Abono a deuda": f"{escenario['pago_deuda']:.0%}",
+        "Flujo de caja": format_currency(escenario["flujo_caja"]),
+        f"Patrimonio en {meses} meses": format_currency(escenario["patrimonio_proyectado"]),
+        "Perfil": NIVELES[escenario["nivel"]]
+    }
+
+def show_scenario_comparison():
+    """Comparar escenarios de ingresos, gastos y abono a deudas sobre la situación actual"""
+    st.markdown("---")
+    st.subheader("Comparación de escenarios")
+    
+    with st.form("scenario_form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            ingresos = st.number_input("Ingresos mensuales ($)", min_value=0.0, value=3000.0, step=100.0, key="scenario_income")
+            gastos = st.number_input("Gastos mensuales ($)", min_value=0.0, value=2500.0, step=100.0, key="scenario_expenses")
+            activos = st.number_input("Activos totales ($)", min_value=0.0, value=30000.0, step=1000.0, key="scenario_assets")
+            pasivos = st.number_input("Pasivos totales ($)", min_value=0.0, value=15000.0, step=1000.0, key="scenario_liabilities")
+        with col2:
+            variacion = st.slider("Variación de ingresos (± %)", 0, 50, 20, key="scenario_income_range")
+            recorte = st.slider("Recorte máximo de gastos (%)", 0, 50, 30, key="scenario_cut")
+            tasa = st.slider("Tasa anual de las deudas (%)", 0, 60, round(TASA_DEUDA * 100), key="scenario_rate")
+            meses = st.slider("Horizonte (meses)", 1, 60, HORIZONTE_MESES, key="scenario_months")
+        
+        submitted = st.form_submit_button("Comparar escenarios")
+    
+    if not submitted:
+        return
+    
+    # Ingresos y gastos en pasos de 1 punto, abono a deudas en pasos de 5% (21 opciones)
+    tabla = evaluar_escenarios(
+        ingresos, gastos, activos, pasivos,
+        rango_porcentual(-variacion, variacion),
+        rango_porcentual(0, recorte),
+        rango_porcentual(0, 100, 5),
+        tasa / 100,
+        meses
+    )
+    st.caption(f"{len(tabla['nivel']):,} escenarios evaluados")
+    
+    columnas = st.columns(len(NIVELES))
+    for columna, (nivel, cantidad) in zip(columnas, conteo_niveles(tabla).items()):
+        columna.metric(f"Perfil {nivel}", f"{cantidad:,}")
+    
+    st.write("**Menor cambio para alcanzar cada perfil**")
+    minimos = [menor_cambio(tabla, i) for i in range(len(NIVELES))]
+    st.dataframe([scenario_row(escenario, meses) for escenario in minimos if escenario], hide_index=True, use_container_width=True)
+    
+    st.write("**Mejores escenarios**")
+    st.dataframe([scenario_row(escenario, meses) for escenario in mejores_escenarios(tabla)], hide_index=True, use_container_width=True)
+
+def show_evaluation_history(user_email):
+    """Mostrar el historial de evaluaciones del usuario, una página por vez"""
+    st.markdown("---")
+    st.subheader("Historial de evaluaciones")
+    
+    cursores = st.session_state.historial_cursores
+    try:
+        evaluaciones, siguiente = pagina_evaluaciones(DB_PATH, user_email, cursores[-1])
+    except Exception as e:
+        st.error(f"Error cargando historial: {str(e)}")
+        return
+    
+    if not evaluaciones:
+        st.info("Aún no tienes evaluaciones guardadas")
+        return
+    
+    st.dataframe([{
+        "Fecha": evaluacion["fecha"],
+        "Plan": "Pro" if evaluacion["plan"] == "pro" else "Gratuito",
+        "Monto": format_currency(evaluacion["monto"]),
+        "Riesgo": evaluacion["riesgo"],
+        "Objetivo": evaluacion["objetivo"] or "-"
+    } for evaluacion in evaluaciones], hide_index=True, use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if len(cursores) > 1 and st.button("◀ Más recientes", key="history_newer"):
+            cursores.pop()
+            st.rerun()
+    with col2:
+        if siguiente and st.button("Más antiguas ▶", key="history_older"):
+            cursores.append(siguiente)
+            st.rerun()
 
 def show_billing_page():
     """Mostrar página de facturación"""
     st.title("Actualizar a Investly Pro")
     
     user_email = st.session_state.user['email']
+    prefetch_checkout_session(user_email)
     
     st.success("Estás a un paso de desbloquear todas las funciones premium de Investly")
     
@@ -310,6 +427,7 @@ def main():
     if not init_db():
         st.error("Error inicializando la aplicación. Por favor, intenta nuevamente.")
         return
+    iniciar_receptor_webhook()
     
     # Mostrar página de facturación si está solicitada
     if st.session_state.get('show_upgrade'):
@@ -345,6 +463,7 @@ def main():
         st.session_state.user = None
         st.session_state.authenticated = False
         st.session_state.show_upgrade = False
+        st.session_state.historial_cursores = [None]
         st.rerun()
     
     # Contenido principal según suscripción
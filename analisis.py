@@ -0,0 +1,124 @@
+# analisis.py - Cálculos financieros de Investly sin dependencias de Streamlit
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from moneda import format_currency
+
+# Umbrales del perfil de inversión en bienes raíces, de mayor a menor:
+# (nivel, patrimonio neto mínimo, flujo de caja mínimo), ambos estrictos
+UMBRALES_PERFIL = (
+    ("Alto", 50000, 1000),
+    ("Medio", 20000, 500),
+)
+NIVEL_BASE = "Bajo"
+
+# Nombres de nivel por índice, tal como los devuelve clasificar_perfiles
+NIVELES = np.array([nivel for nivel, _, _ in UMBRALES_PERFIL] + [NIVEL_BASE])
+
+# Etiqueta y descripción que se muestran para cada nivel
+PERFILES_INVERSION = {
+    "Alto": ("Alto (70-100%)", "Excelente perfil para inversión en bienes raíces. Tienes la capacidad financiera para comenzar a invertir en propiedades generadoras de ingresos pasivos."),
+    "Medio": ("Medio (40-69%)", "Buen potencial para inversión en bienes raíces. Considera comenzar con propiedades pequeñas o co-inversiones mientras mejoras tu flujo de caja."),
+    "Bajo": ("Bajo (0-39%)", "Necesitas fortalecer tu situación financiera antes de invertir en bienes raíces. Enfócate en aumentar ingresos, reducir deudas y ahorrar."),
+}
+
+# Patrimonio neto a partir del cual se considera sólido (garantía para financiamiento)
+PATRIMONIO_SOLIDO = 50000
+
+
+@dataclass(frozen=True)
+class AnalisisFinanciero:
+    """Resultado inmutable del análisis de la situación financiera"""
+    __slots__ = ("ingresos", "gastos", "activos", "pasivos", "flujo_caja", "patrimonio_neto",
+                 "nivel", "perfil", "descripcion")
+    ingresos: float
+    gastos: float
+    activos: float
+    pasivos: float
+    flujo_caja: float
+    patrimonio_neto: float
+    nivel: str
+    perfil: str
+    descripcion: str
+
+    @property
+    def flujo_positivo(self):
+        return self.flujo_caja > 0
+
+    @property
+    def patrimonio_positivo(self):
+        return self.patrimonio_neto > 0
+
+    @property
+    def patrimonio_solido(self):
+        return self.patrimonio_neto > PATRIMONIO_SOLIDO
+
+
+def nivel_perfil(patrimonio_neto, flujo_caja):
+    """Nivel Alto/Medio/Bajo según patrimonio neto y flujo de caja mensual"""
+    for nivel, patrimonio_min, flujo_min in UMBRALES_PERFIL:
+        if patrimonio_neto > patrimonio_min and flujo_caja > flujo_min:
+            return nivel
+    return NIVEL_BASE
+
+
+def evaluar_finanzas(ingresos, gastos, activos, pasivos):
+    """Flujo de caja mensual, patrimonio neto y nivel de perfil de un usuario"""
+    flujo_caja = ingresos - gastos
+    patrimonio_neto = activos - pasivos
+    return flujo_caja, patrimonio_neto, nivel_perfil(patrimonio_neto, flujo_caja)
+
+
+@lru_cache(maxsize=1024)
+def analizar_finanzas(ingresos, gastos, activos, pasivos):
+    """Análisis completo de la situación financiera (memoizado por entradas)"""
+    flujo_caja, patrimonio_neto, nivel = evaluar_finanzas(ingresos, gastos, activos, pasivos)
+    perfil, descripcion = PERFILES_INVERSION[nivel]
+    return AnalisisFinanciero(
+        ingresos, gastos, activos, pasivos, flujo_caja, patrimonio_neto, nivel, perfil, descripcion
+    )
+
+
+def clasificar_perfiles(patrimonio_neto, flujo_caja):
+    """Índice de nivel (ver NIVELES) para arrays de perfiles en una sola pasada vectorizada
+
+    Aplica exactamente los mismos umbrales que nivel_perfil; acepta escalares o arrays
+    con forma compatible.
+    """
+    patrimonio = np.asarray(patrimonio_neto, dtype=np.float64)
+    flujo = np.asarray(flujo_caja, dtype=np.float64)
+    indices = np.full(np.broadcast(patrimonio, flujo).shape, len(UMBRALES_PERFIL), dtype=np.int8)
+    # De menor a mayor nivel para que el más alto que se cumpla prevalezca
+    for i in range(len(UMBRALES_PERFIL) - 1, -1, -1):
+        _, patrimonio_min, flujo_min = UMBRALES_PERFIL[i]
+        indices[(patrimonio > patrimonio_min) & (flujo > flujo_min)] = i
+    return indices
+
+
+def evaluar_finanzas_lote(ingresos, gastos, activos, pasivos):
+    """Versión vectorizada de evaluar_finanzas: arrays de flujo, patrimonio e índice de nivel"""
+    flujo_caja = np.subtract(ingresos, gastos, dtype=np.float64)
+    patrimonio_neto = np.subtract(activos, pasivos, dtype=np.float64)
+    return flujo_caja, patrimonio_neto, clasificar_perfiles(patrimonio_neto, flujo_caja)
+
+
+def resumen_analisis(resultado):
+    """Texto resumen del análisis para el reporte"""
+    return f"""
+        Situación Financiera Actual:
+        - Ingresos Mensuales: {format_currency(resultado.ingresos)}
+        - Gastos Mensuales: {format_currency(resultado.gastos)}
+        - Flujo de Caja: {format_currency(resultado.flujo_caja)} ({'Positivo' if resultado.flujo_positivo else 'Negativo'})
+        - Activos Totales: {format_currency(resultado.activos)}
+        - Pasivos Totales: {format_currency(resultado.pasivos)}
+        - Patrimonio Neto: {format_currency(resultado.patrimonio_neto)} ({'Positivo' if resultado.patrimonio_positivo else 'Negativo'})
+        
+        Perfil de Inversión en Bienes Raíces: {resultado.perfil}
+        {resultado.descripcion}
+        
+        Análisis:
+        {'Tienes un flujo de caja positivo que podrías destinar a inversión en propiedades.' if resultado.flujo_positivo else 'Necesitas equilibrar tu flujo de caja antes de considerar inversiones.'}
+        {'Tu patrimonio neto es sólido y podrías usarlo como garantía para financiamiento.' if resultado.patrimonio_solido else 'Considera fortalecer tu patrimonio antes de inversiones significativas.'}
+        """
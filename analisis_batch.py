@@ -0,0 +1,139 @@
+# analisis_batch.py - Análisis financiero por lotes sin interfaz de Streamlit
+#
+# Uso:
+#   python analisis_batch.py                                  # finanzas de usuarios.db -> tabla perfiles
+#   python analisis_batch.py --entrada datos.csv --salida perfiles.jsonl
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from analisis import NIVELES, evaluar_finanzas_lote
+from db import get_pool
+from ingesta import leer_monto, leer_registros
+from migrations import migrate, USUARIOS_MIGRATIONS
+
+COLUMNAS = ("ingresos_mensuales", "gastos_mensuales", "activos_totales", "pasivos_totales")
+COLUMNAS_SALIDA = ("finanzas_id", "usuario_id", "flujo_caja", "patrimonio_neto", "perfil")
+
+
+def leer_db(path, lote):
+    """Filas de la tabla finanzas en lotes de (id, usuario_id, ingresos, gastos, activos, pasivos)"""
+    with get_pool(path).connection() as conn:
+        cursor = conn.execute(f"SELECT id, usuario_id, {', '.join(COLUMNAS)} FROM finanzas ORDER BY id")
+        while True:
+            filas = cursor.fetchmany(lote)
+            if not filas:
+                break
+            yield filas
+
+
+def leer_archivo(path, lote):
+    """Filas de un CSV/JSONL con las mismas columnas que la tabla finanzas"""
+    filas = []
+    for i, registro in enumerate(leer_registros(path), start=1):
+        filas.append((
+            registro.get("id") or i,
+            registro.get("usuario_id"),
+            *(registro.get(columna) for columna in COLUMNAS),
+        ))
+        if len(filas) >= lote:
+            yield filas
+            filas = []
+    if filas:
+        yield filas
+
+
+def evaluar_lote(filas):
+    """Resultados (finanzas_id, usuario_id, flujo_caja, patrimonio_neto, perfil) de un lote
+
+    Las filas con un monto ilegible se informan por stderr y se omiten; no detienen el lote.
+    """
+    validas = []
+    for finanzas_id, usuario_id, *celdas in filas:
+        montos = [leer_monto(celda) for celda in celdas]
+        if None in montos:
+            print(f"fila {finanzas_id} omitida: monto inválido en {celdas}", file=sys.stderr)
+            continue
+        validas.append((finanzas_id, usuario_id, *montos))
+    if not validas:
+        return []
+    ids, usuarios, *montos = zip(*validas)
+    ingresos, gastos, activos, pasivos = (np.array(columna, dtype=np.float64) for columna in montos)
+    flujo, patrimonio, indices = evaluar_finanzas_lote(ingresos, gastos, activos, pasivos)
+    return list(zip(ids, usuarios, flujo.tolist(), patrimonio.tolist(), NIVELES[indices].tolist()))
+
+
+def escribir_db(path, resultados):
+    with get_pool(path).transaction() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO perfiles (finanzas_id, usuario_id, flujo_caja, patrimonio_neto, perfil) "
+            "VALUES (?, ?, ?, ?, ?)",
+            resultados,
+        )
+
+
+class EscritorArchivo:
+    """Salida CSV o JSONL según la extensión del archivo"""
+
+    def __init__(self, path):
+        self.jsonl = path.endswith(".jsonl")
+        self._f = open(path, "w", newline="", encoding="utf-8")
+        if not self.jsonl:
+            self._csv = csv.writer(self._f)
+            self._csv.writerow(COLUMNAS_SALIDA)
+
+    def escribir(self, resultados):
+        if self.jsonl:
+            self._f.writelines(json.dumps(dict(zip(COLUMNAS_SALIDA, r)), ensure_ascii=False) + "\n" for r in resultados)
+        else:
+            self._csv.writerows(resultados)
+
+    def cerrar(self):
+        self._f.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recalcular flujo de caja, patrimonio neto y perfil de inversión por lotes")
+    parser.add_argument("--db", default="usuarios.db", help="base de datos SQLite (por defecto usuarios.db)")
+    parser.add_argument("--entrada", help="CSV/JSONL con columnas de finanzas en lugar de la tabla finanzas")
+    parser.add_argument("--salida", help="CSV/JSONL de resultados en lugar de la tabla perfiles")
+    parser.add_argument("--lote", type=int, default=10000, help="filas por lote (por defecto 10000)")
+    args = parser.parse_args(argv)
+
+    if args.entrada and not args.salida:
+        parser.error("--salida es obligatorio cuando se usa --entrada")
+    if not args.entrada and not os.path.exists(args.db):
+        parser.error(f"no existe la base de datos {args.db}")
+
+    if not args.entrada:
+        migrate(args.db, USUARIOS_MIGRATIONS)
+
+    lotes = leer_archivo(args.entrada, args.lote) if args.entrada else leer_db(args.db, args.lote)
+    escritor = EscritorArchivo(args.salida) if args.salida else None
+
+    inicio = time.perf_counter()
+    total = 0
+    try:
+        for filas in lotes:
+            resultados = evaluar_lote(filas)
+            if escritor:
+                escritor.escribir(resultados)
+            else:
+                escribir_db(args.db, resultados)
+            total += len(resultados)
+    finally:
+        if escritor:
+            escritor.cerrar()
+
+    duracion = time.perf_counter() - inicio
+    print(f"{total} perfiles procesados en {duracion:.2f} s ({total / duracion if duracion else 0:,.0f} filas/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# bench_db.py - Inserciones/consultas por segundo: sqlite3.connect por llamada vs pool
+#
+# Uso: python benchmarks/bench_db.py [n]
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import ConnectionPool
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS users (
+        email TEXT PRIMARY KEY,
+        subscription_status BOOLEAN DEFAULT FALSE,
+        subscription_end DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+INSERT = "INSERT OR IGNORE INTO users (email) VALUES (?)"
+SELECT = "SELECT subscription_status, subscription_end FROM users WHERE email = ?"
+
+
+def por_llamada(path, n):
+    """Patrón original: abrir, ejecutar una sentencia y cerrar en cada llamada"""
+    inicio = time.perf_counter()
+    for i in range(n):
+        conn = sqlite3.connect(path)
+        conn.execute(INSERT, (f"user{i}@investly.com",))
+        conn.commit()
+        conn.close()
+    inserts = n / (time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    for i in range(n):
+        conn = sqlite3.connect(path)
+        conn.execute(SELECT, (f"user{i}@investly.com",)).fetchone()
+        conn.close()
+    lookups = n / (time.perf_counter() - inicio)
+    return inserts, lookups
+
+
+def con_pool(path, n):
+    """Patrón nuevo: conexiones del pool con WAL y sentencias cacheadas"""
+    pool = ConnectionPool(path)
+    inicio = time.perf_counter()
+    for i in range(n):
+        with pool.transaction() as conn:
+            conn.execute(INSERT, (f"user{i}@investly.com",))
+    inserts = n / (time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    for i in range(n):
+        with pool.connection() as conn:
+            conn.execute(SELECT, (f"user{i}@investly.com",)).fetchone()
+    lookups = n / (time.perf_counter() - inicio)
+    pool.close()
+    return inserts, lookups
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        resultados = {}
+        for nombre, fn in (("por llamada", por_llamada), ("pool", con_pool)):
+            path = os.path.join(tmp, f"{nombre.replace(' ', '_')}.db")
+            conn = sqlite3.connect(path)
+            conn.execute(SCHEMA)
+            conn.close()
+            resultados[nombre] = fn(path, n)
+
+    print(f"{'modo':<12} {'inserts/s':>12} {'lookups/s':>12}")
+    for nombre, (inserts, lookups) in resultados.items():
+        print(f"{nombre:<12} {inserts:>12,.0f} {lookups:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
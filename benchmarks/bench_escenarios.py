@@ -0,0 +1,58 @@
+# bench_escenarios.py - Comparación de escenarios: bucle escalar vs rejilla vectorizada
+#
+# Uso: python benchmarks/bench_escenarios.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analisis import NIVELES, evaluar_finanzas, nivel_perfil
+from escenarios import (HORIZONTE_MESES, TASA_DEUDA, evaluar_escenarios, mejores_escenarios, menor_cambio,
+                        rango_porcentual, rejilla_escenarios)
+
+BASE = (3000.0, 2500.0, 30000.0, 15000.0)
+
+
+def escenarios_escalar(ingresos, gastos, activos, pasivos, variaciones, recortes, pagos):
+    """Un escenario por iteración con evaluar_finanzas, como se haría sin el motor"""
+    filas = []
+    for v, r, p in zip(*(eje.tolist() for eje in rejilla_escenarios(variaciones, recortes, pagos))):
+        abono = min(p * pasivos, max(activos, 0.0))
+        flujo, patrimonio, _ = evaluar_finanzas(
+            ingresos * (1 + v), gastos * (1 - r) - abono * (TASA_DEUDA / 12), activos - abono, pasivos - abono
+        )
+        proyectado = patrimonio + flujo * HORIZONTE_MESES
+        filas.append((v, r, p, flujo, proyectado, nivel_perfil(proyectado, flujo)))
+    filas.sort(key=lambda fila: (list(NIVELES).index(fila[5]), -fila[4]))
+    return filas
+
+
+def main():
+    # (variación de ingresos ±%, recorte máximo %, paso del abono %) -> ~1k, ~27k, ~100k y ~1M escenarios
+    rejillas = ((5, 10, 10), (20, 30, 5), (50, 50, 5), (50, 50, 0.5))
+    for variacion, recorte, paso in rejillas:
+        ejes = (rango_porcentual(-variacion, variacion), rango_porcentual(0, recorte), rango_porcentual(0, 100, paso))
+        n = len(ejes[0]) * len(ejes[1]) * len(ejes[2])
+
+        inicio = time.perf_counter()
+        tabla = evaluar_escenarios(*BASE, *ejes)
+        mejores = mejores_escenarios(tabla)
+        minimos = [menor_cambio(tabla, i) for i in range(len(NIVELES))]
+        t_vector = time.perf_counter() - inicio
+
+        linea = f"{n:>9,} escenarios  vectorizado {t_vector * 1000:>8.1f} ms"
+        if n <= 100_000:
+            inicio = time.perf_counter()
+            escalar = escenarios_escalar(*BASE, *ejes)
+            t_escalar = time.perf_counter() - inicio
+            assert np.allclose([fila[4] for fila in escalar[:10]], [m["patrimonio_proyectado"] for m in mejores])
+            linea += f"  escalar {t_escalar * 1000:>8.1f} ms  ({t_escalar / t_vector:.0f}x)"
+        print(linea)
+    print("menor cambio por perfil:", [m and (m["variacion_ingreso"], m["recorte_gasto"], m["pago_deuda"]) for m in minimos])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# bench_estilos.py - Bytes de estilos y encabezado que viajan en cada rerun de APPOPTIMAV1
+#
+# Uso: python benchmarks/bench_estilos.py
+import os
+import sys
+
+from streamlit.proto.Markdown_pb2 import Markdown
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from estilos import ENCABEZADO, RUTA_CSS, cabecera_html
+
+
+def bytes_delta(*cuerpos):
+    """Tamaño serializado de los elementos markdown (sin el sobre del ForwardMsg)"""
+    return sum(Markdown(body=cuerpo, allow_html=True).ByteSize() for cuerpo in cuerpos)
+
+
+def main():
+    with open(RUTA_CSS, encoding="utf-8") as f:
+        css = f.read()
+    # Antes: load_css() con la hoja completa y dos st.markdown más para el encabezado
+    inicio, fin = ENCABEZADO.split('<div class="calculator-container">')
+    antes = bytes_delta(f"<style>\n{css}</style>", inicio, '<div class="calculator-container">' + fin)
+    en_linea = bytes_delta(cabecera_html(False))
+    estatico = bytes_delta(cabecera_html(True))
+    print(f"antes (CSS completo + 3 elementos): {antes:>6,} bytes/rerun")
+    print(f"CSS minificado en línea:            {en_linea:>6,} bytes/rerun ({en_linea / antes:.0%})")
+    print(f"hoja estática (<link> versionado):  {estatico:>6,} bytes/rerun ({estatico / antes:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# bench_evaluaciones.py - Página del historial a distintas profundidades: OFFSET vs. keyset
+#
+# Uso: python benchmarks/bench_evaluaciones.py [evaluaciones]
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_pool
+from evaluaciones import SQL_PAGINA, SQL_PRIMERA_PAGINA, TAMANO_PAGINA, pagina_evaluaciones, serializar
+from migrations import migrate, INVESTLY_MIGRATIONS
+
+EMAIL = "historial@correo.com"
+SQL_OFFSET = (
+    "SELECT id, evaluation_data, created_at FROM evaluations WHERE user_email = ? "
+    "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
+)
+
+
+def poblar(path, n):
+    """n evaluaciones de un usuario más otras tantas repartidas entre 1000 usuarios, 10 por segundo"""
+    rng = random.Random(7)
+    migrate(path, INVESTLY_MIGRATIONS)
+    otros = [f"usuario{i}@correo.com" for i in range(1000)]
+    with get_pool(path).transaction() as conn:
+        conn.executemany("INSERT INTO users (email) VALUES (?)", [(email,) for email in otros + [EMAIL]])
+        filas = []
+        for i in range(2 * n):
+            evaluacion = {
+                "plan": "pro",
+                "monto": rng.randrange(100, 50000),
+                "riesgo": rng.choice(["Baja", "Media", "Alta"]),
+                "objetivo": rng.choice(["Crecimiento a largo plazo", "Ingreso regular", "Preservación de capital"]),
+            }
+            fecha = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(1_600_000_000 + i // 10))
+            filas.append((EMAIL if i % 2 else rng.choice(otros), serializar(evaluacion), fecha))
+        conn.executemany("INSERT INTO evaluations (user_email, evaluation_data, created_at) VALUES (?, ?, ?)", filas)
+
+
+def medir(fn, repeticiones=200):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        fn()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "investly.db")
+        poblar(path, n)
+        pool = get_pool(path)
+
+        # Cursores de cada página recorriendo el historial completo
+        cursores, cursor = [None], None
+        while True:
+            _, cursor = pagina_evaluaciones(path, EMAIL, cursor)
+            if cursor is None:
+                break
+            cursores.append(cursor)
+        print(f"{n} evaluaciones del usuario en {len(cursores)} páginas de {TAMANO_PAGINA}")
+
+        for pagina in (0, len(cursores) // 10, len(cursores) // 2, len(cursores) - 1):
+            def offset():
+                with pool.connection() as conn:
+                    conn.execute(SQL_OFFSET, (EMAIL, TAMANO_PAGINA, pagina * TAMANO_PAGINA)).fetchall()
+            def keyset():
+                with pool.connection() as conn:
+                    if cursores[pagina] is None:
+                        conn.execute(SQL_PRIMERA_PAGINA, (EMAIL, TAMANO_PAGINA)).fetchall()
+                    else:
+                        conn.execute(SQL_PAGINA, (EMAIL, *cursores[pagina], TAMANO_PAGINA)).fetchall()
+            print(f"página {pagina + 1:>6}:  OFFSET {medir(offset) * 1e6:>9,.0f} µs   keyset {medir(keyset) * 1e6:>6,.0f} µs")
+
+        evaluacion = {"plan": "pro", "monto": 12500, "riesgo": "Media", "objetivo": "Ingreso regular"}
+        print(f"bytes por evaluación: dict JSON {len(json.dumps(evaluacion))}  esquema v1 {len(serializar(evaluacion))}")
+
+
+if __name__ == "__main__":
+    main()
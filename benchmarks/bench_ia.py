@@ -0,0 +1,66 @@
+# bench_ia.py - Trabajos de IA en segundo plano contra el servidor OpenAI falso
+#
+# Uso: python benchmarks/bench_ia.py [solicitudes] [latencia]
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import wait
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from cache_ia import CacheRespuestas
+from fake_openai import iniciar
+from ia import PoolTrabajos, PoolSaturado, iniciar_plan, solicitar_plan
+
+
+def main():
+    solicitudes = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    latencia = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    servidor = iniciar(port=0, latencia=latencia)
+    client = OpenAI(api_key="sk-fake", base_url=f"http://127.0.0.1:{servidor.server_port}/v1")
+    pool = PoolTrabajos(max_workers=4, max_pendientes=16)
+
+    inicio = time.perf_counter()
+    futuros, rechazadas = [], 0
+    for i in range(solicitudes):
+        try:
+            futuros.append(pool.enviar(solicitar_plan, client, f"prompt {i}"))
+        except PoolSaturado:
+            rechazadas += 1
+    envio = time.perf_counter() - inicio
+    wait(futuros)
+    total = time.perf_counter() - inicio
+
+    print(f"enviadas: {len(futuros)}  rechazadas (pool lleno): {rechazadas}")
+    print(f"tiempo de envío (bloqueo del hilo de UI): {envio * 1000:.1f} ms")
+    print(f"tiempo total: {total:.2f} s  ({len(futuros) / total:.1f} planes/s)")
+
+    # Tiempo hasta el primer token visible: respuesta completa vs stream=True
+    inicio = time.perf_counter()
+    pool.enviar(solicitar_plan, client, "prompt").result()
+    completo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    trabajo = iniciar_plan(pool, client, "prompt")
+    while not trabajo.texto() and not trabajo.done():
+        time.sleep(0.005)
+    primer_token = time.perf_counter() - inicio
+    trabajo.futuro.result()
+    print(f"primer texto visible: completo {completo * 1000:.0f} ms  vs  streaming {primer_token * 1000:.0f} ms")
+
+    # Caché persistente: la misma solicitud repetida no vuelve a llamar a OpenAI
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CacheRespuestas(os.path.join(tmp, "cache_ia.db"))
+        for _ in range(10):
+            inicio = time.perf_counter()
+            iniciar_plan(pool, client, "prompt repetido", cache=cache).futuro.result()
+            ultimo = time.perf_counter() - inicio
+        print(f"caché: {cache.estadisticas()}  última solicitud: {ultimo * 1000:.2f} ms")
+    pool.cerrar()
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# bench_indices.py - Búsquedas por email sobre un millón de usuarios, con y sin índices
+#
+# Uso: python benchmarks/bench_indices.py [usuarios]
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_pool
+from indices import CONSULTAS_INVESTLY, CONSULTAS_USUARIOS, verificar_planes
+from ingesta import ingerir_lote
+from migrations import migrate, INVESTLY_MIGRATIONS, USUARIOS_MIGRATIONS
+
+LOTE = 100_000
+
+
+def latencias(path, sql, valores):
+    """Microsegundos por consulta (una conexión del pool, como la app)"""
+    resultado = []
+    with get_pool(path).connection() as conn:
+        for valor in valores:
+            inicio = time.perf_counter()
+            conn.execute(sql, (valor,)).fetchall()
+            resultado.append((time.perf_counter() - inicio) * 1e6)
+    return resultado
+
+
+def resumen(nombre, muestras):
+    muestras = sorted(muestras)
+    p99 = muestras[min(len(muestras) - 1, int(len(muestras) * 0.99))]
+    print(f"{nombre:<48} p50 {statistics.median(muestras):>10,.1f} µs  p99 {p99:>10,.1f} µs")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(42)
+    emails = [f"usuario{rng.randrange(n)}@ejemplo.com" for _ in range(10_000)]
+    pocos = emails[:50]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # investly.db: suscripción por email antes (v1, autoíndice) y después (v2, WITHOUT ROWID)
+        investly = os.path.join(tmp, "investly.db")
+        migrate(investly, INVESTLY_MIGRATIONS[:1])
+        with get_pool(investly).transaction() as conn:
+            conn.executemany(
+                "INSERT INTO users (email, subscription_status, subscription_end) VALUES (?, ?, ?)",
+                ((f"usuario{i}@ejemplo.com", i % 3 == 0, "2030-01-01") for i in range(n)),
+            )
+        sql_suscripcion = CONSULTAS_INVESTLY[0][1]
+        print(f"{n:,} usuarios")
+        resumen("suscripción por email (v1, autoíndice)", latencias(investly, sql_suscripcion, emails))
+        inicio = time.perf_counter()
+        migrate(investly, INVESTLY_MIGRATIONS)
+        print(f"  migración a WITHOUT ROWID: {time.perf_counter() - inicio:.1f} s")
+        assert not verificar_planes(investly, CONSULTAS_INVESTLY), "plan de investly.db sin índice"
+        resumen("suscripción por email (v2, clave primaria)", latencias(investly, sql_suscripcion, emails))
+
+        # usuarios.db: búsqueda por email sin índice (v2) y con idx_usuarios_email (v3)
+        usuarios = os.path.join(tmp, "usuarios.db")
+        migrate(usuarios, USUARIOS_MIGRATIONS[:2])
+        for inicio in range(0, n, LOTE):
+            ingerir_lote(usuarios, ({
+                "nombre": f"Usuario {i}", "edad": 30, "email": f"usuario{i}@ejemplo.com",
+                "ingresos_mensuales": 5000, "gastos_mensuales": 3000,
+                "activos_totales": 100000, "pasivos_totales": 20000,
+            } for i in range(inicio, min(n, inicio + LOTE))))
+        sql_email = CONSULTAS_USUARIOS[0][1]
+        resumen("usuario por email (v2, recorrido completo)", latencias(usuarios, sql_email, pocos))
+        migrate(usuarios, USUARIOS_MIGRATIONS)
+        assert not verificar_planes(usuarios, CONSULTAS_USUARIOS), "plan de usuarios.db sin índice"
+        resumen("usuario por email (v3, idx_usuarios_email)", latencias(usuarios, sql_email, emails))
+        resumen("finanzas por usuario (v3, idx_finanzas_usuario)",
+                latencias(usuarios, CONSULTAS_USUARIOS[1][1], [rng.randrange(1, n + 1) for _ in range(10_000)]))
+        for path in (investly, usuarios):
+            get_pool(path).close()
+
+
+if __name__ == "__main__":
+    main()
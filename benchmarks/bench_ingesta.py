@@ -0,0 +1,67 @@
+# bench_ingesta.py - Alta de usuarios con finanzas: una transacción por fila vs ingesta por lotes
+#
+# Uso: python benchmarks/bench_ingesta.py [filas]
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_pool
+from ingesta import COLUMNAS_FINANZAS, COLUMNAS_USUARIO, ingerir_archivo, insertar_finanzas, insertar_usuario
+from migrations import migrate, USUARIOS_MIGRATIONS
+
+
+def generar_csv(path, n):
+    rng = random.Random(42)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(COLUMNAS_USUARIO + COLUMNAS_FINANZAS)
+        for i in range(n):
+            escritor.writerow((
+                f"Usuario {i}", rng.randint(18, 80), f"usuario{i}@ejemplo.com", f"300{i:07d}",
+                round(rng.uniform(500, 20_000), 2), round(rng.uniform(300, 15_000), 2),
+                round(rng.uniform(0, 500_000), 2), round(rng.uniform(0, 200_000), 2),
+            ))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    por_fila = min(n, 2_000)
+    with tempfile.TemporaryDirectory() as tmp:
+        entrada = os.path.join(tmp, "usuarios.csv")
+        generar_csv(entrada, n)
+
+        # Ruta de la app: una transacción por usuario y otra por sus finanzas
+        db_fila = os.path.join(tmp, "fila.db")
+        migrate(db_fila, USUARIOS_MIGRATIONS)
+        pool = get_pool(db_fila)
+        inicio = time.perf_counter()
+        for i in range(por_fila):
+            with pool.transaction() as conn:
+                usuario_id = insertar_usuario(conn, f"Usuario {i}", 30, f"usuario{i}@ejemplo.com", "3000000000")
+            with pool.transaction() as conn:
+                insertar_finanzas(conn, usuario_id, 5000.0, 3000.0, 100000.0, 20000.0)
+        t_fila = time.perf_counter() - inicio
+        pool.close()
+
+        db_lote = os.path.join(tmp, "lote.db")
+        inicio = time.perf_counter()
+        usuarios, finanzas, _ = ingerir_archivo(db_lote, entrada)
+        t_lote = time.perf_counter() - inicio
+        with get_pool(db_lote).connection() as conn:
+            huerfanas = conn.execute(
+                "SELECT COUNT(*) FROM finanzas f LEFT JOIN usuarios u ON u.id = f.usuario_id WHERE u.id IS NULL"
+            ).fetchone()[0]
+        get_pool(db_lote).close()
+
+    assert usuarios == finanzas == n and huerfanas == 0, "la ingesta no cargó todas las filas"
+    print(f"una transacción por fila: {por_fila / t_fila:>10,.0f} usuarios/s  ({por_fila:,} filas)")
+    print(f"ingesta por lotes:        {n / t_lote:>10,.0f} usuarios/s  ({n:,} filas, CSV incluido)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# bench_moneda.py - Lectura y formato de montos sobre un corpus de un millón de strings
+#
+# Uso: python benchmarks/bench_moneda.py [n] [distintos]
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from moneda import format_currency, parse_currency
+
+
+def parse_original(currency_str):
+    """Implementación anterior: quita todo menos dígitos y puntos ("1.234,56" -> 1.23456)"""
+    if not currency_str:
+        return 0.0
+    num_str = re.sub(r'[^\d.]', '', currency_str)
+    return float(num_str) if num_str else 0.0
+
+
+def medir(nombre, fn, datos):
+    inicio = time.perf_counter()
+    for dato in datos:
+        fn(dato)
+    duracion = time.perf_counter() - inicio
+    print(f"{nombre:<28} {duracion:7.3f} s  ({len(datos) / duracion:>12,.0f} /s)")
+    return duracion
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    distintos = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    rng = random.Random(42)
+    # Montos repetidos como en los formularios: la mayoría en "$1,234.56", algunos en "1.234,56"
+    montos = [round(rng.lognormvariate(7, 2), 2) for _ in range(distintos)]
+    textos = [format_currency(m, "es_CO" if i % 5 == 0 else "en_US") for i, m in enumerate(montos)]
+    corpus = [textos[min(int(rng.paretovariate(1.2)) - 1, distintos - 1)] for _ in range(n)]
+    valores = [montos[textos.index(t)] for t in textos[:100]]
+    assert [parse_currency(t) for t in textos[:100]] == valores, "lectura incorrecta"
+
+    print(f"{n:,} strings ({distintos:,} distintos)")
+    medir("leer: regex original", parse_original, corpus)
+    medir("leer: codec sin caché", parse_currency.__wrapped__, corpus)
+    parse_currency.cache_clear()
+    medir("leer: codec con caché", parse_currency, corpus)
+    print(f"  aciertos de caché: {parse_currency.cache_info().hits / n:.1%}")
+
+    numeros = [montos[min(int(rng.paretovariate(1.2)) - 1, distintos - 1)] for _ in range(n)]
+    medir("formato: sin caché", format_currency.__wrapped__, numeros)
+    format_currency.cache_clear()
+    medir("formato: con caché", format_currency, numeros)
+    errores = sum(parse_original(t) != parse_currency(t) for t in textos)
+    print(f"montos que la implementación anterior leía mal: {errores:,} de {distintos:,}")
+
+
+if __name__ == "__main__":
+    main()
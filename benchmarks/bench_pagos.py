@@ -0,0 +1,129 @@
+# bench_pagos.py - Latencia p50/p99 de checkout contra el servidor Stripe falso
+#
+# Uso: python benchmarks/bench_pagos.py [checkouts] [latencia] [latencia_conexion]
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import wait
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stripe
+
+from fake_stripe import FakeStripeHandler, iniciar
+from pagos import CacheCheckout, ClienteStripe
+
+PARAMS = ("usuario@correo.com", "price_prueba", "https://investly.app/success", "https://investly.app/")
+
+
+def checkout_anterior(resultado):
+    """Ruta anterior de NewAPP*.py: api_key global y Session.create en el hilo del rerun"""
+    stripe.api_key = "sk_test_prueba"
+    email, price_id, success_url, cancel_url = PARAMS
+    try:
+        resultado.append(stripe.checkout.Session.create(
+            payment_method_types=['card'],
+            line_items=[{'price': price_id, 'quantity': 1}],
+            mode='subscription',
+            customer_email=email,
+            success_url=success_url + "?session_id={CHECKOUT_SESSION_ID}",
+            cancel_url=cancel_url,
+            metadata={"user_email": email},
+        ).url)
+    except stripe.error.StripeError:
+        resultado.append(None)
+
+
+def medir_anterior(checkouts):
+    # Streamlit ejecuta cada rerun en un hilo nuevo y stripe guarda su requests.Session por hilo:
+    # cada clic abre una conexión nueva. Sin reintentos, como el valor por defecto de stripe
+    # (ClienteStripe fija stripe.max_network_retries para todo el proceso)
+    stripe.max_network_retries = 0
+    latencias, urls = [], []
+    for _ in range(checkouts):
+        inicio = time.perf_counter()
+        hilo = threading.Thread(target=checkout_anterior, args=(urls,))
+        hilo.start()
+        hilo.join()
+        latencias.append(time.perf_counter() - inicio)
+    return latencias, sum(url is not None for url in urls)
+
+
+def medir_cliente(cliente, checkouts):
+    latencias, exitos = [], 0
+    for _ in range(checkouts):
+        inicio = time.perf_counter()
+        try:
+            exitos += bool(cliente.crear_checkout(*PARAMS).result()["url"])
+        except stripe.error.StripeError:
+            pass
+        latencias.append(time.perf_counter() - inicio)
+    return latencias, exitos
+
+
+def medir_precarga(cliente, checkouts):
+    """Clic con la sesión ya creada al mostrar la página de pago"""
+    cache = CacheCheckout(cliente, *PARAMS[1:])
+    emails = [f"usuario{i}@correo.com" for i in range(checkouts)]
+    # Al mostrar show_billing_page; el usuario tarda más en hacer clic que Stripe en responder
+    wait([cache.precargar(email) for email in emails])
+    latencias = []
+    for email in emails:
+        inicio = time.perf_counter()
+        cache.url(email)
+        latencias.append(time.perf_counter() - inicio)
+    return latencias, len(emails)
+
+
+def _duracion(segundos):
+    return f"{segundos * 1000:>7.1f} ms" if segundos >= 1e-3 else f"{segundos * 1e6:>7.1f} µs"
+
+
+def reportar(nombre, latencias, exitos, conexiones):
+    percentiles = statistics.quantiles(latencias, n=100)
+    print(
+        f"{nombre:<34} p50 {_duracion(percentiles[49])}  p99 {_duracion(percentiles[98])}  "
+        f"éxitos {exitos}/{len(latencias)}  conexiones {conexiones}"
+    )
+
+
+def main():
+    checkouts = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latencia = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    latencia_conexion = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+    servidor = iniciar(port=0, latencia=latencia, latencia_conexion=latencia_conexion)
+    api_base = f"http://127.0.0.1:{servidor.server_port}"
+    stripe.api_base = api_base
+    print(f"{checkouts} checkouts; servidor: {latencia * 1000:.0f} ms por solicitud, "
+          f"{latencia_conexion * 1000:.0f} ms por conexión nueva")
+
+    for fallos in (0.0, 0.1):
+        FakeStripeHandler.fallos = fallos
+        print(f"-- {fallos:.0%} de respuestas 500")
+        FakeStripeHandler.conexiones = 0
+        reportar("anterior (conexión por rerun)", *medir_anterior(checkouts), FakeStripeHandler.conexiones)
+
+        cliente = ClienteStripe("sk_test_prueba", api_base=api_base)
+        FakeStripeHandler.conexiones = 0
+        reportar("ClienteStripe (keep-alive)", *medir_cliente(cliente, checkouts), FakeStripeHandler.conexiones)
+
+        # Lo que bloquea el hilo de Streamlit: solo encolar el trabajo
+        inicio = time.perf_counter()
+        futuro = cliente.crear_checkout(*PARAMS)
+        envio = time.perf_counter() - inicio
+        try:
+            futuro.result()
+        except stripe.error.StripeError:
+            pass
+        print(f"{'bloqueo del hilo de UI al encolar':<34} {_duracion(envio).strip()}")
+        if not fallos:
+            FakeStripeHandler.conexiones = 0
+            reportar("CacheCheckout (precargada)", *medir_precarga(cliente, checkouts), FakeStripeHandler.conexiones)
+        cliente.cerrar()
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# bench_perfiles.py - Clasificación de perfiles: bucle escalar vs motor vectorizado
+#
+# Uso: python benchmarks/bench_perfiles.py [n]
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analisis import NIVELES, clasificar_perfiles, nivel_perfil
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(42)
+    patrimonio = rng.uniform(-50_000, 150_000, n)
+    flujo = rng.uniform(-2_000, 4_000, n)
+
+    inicio = time.perf_counter()
+    escalar = [nivel_perfil(p, f) for p, f in zip(patrimonio.tolist(), flujo.tolist())]
+    t_escalar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    indices = clasificar_perfiles(patrimonio, flujo)
+    t_vector = time.perf_counter() - inicio
+
+    assert NIVELES[indices].tolist() == escalar, "el motor vectorizado no coincide con el escalar"
+    print(f"{n:,} perfiles")
+    print(f"escalar:     {t_escalar:8.3f} s  ({n / t_escalar:>14,.0f} perfiles/s)")
+    print(f"vectorizado: {t_vector:8.3f} s  ({n / t_vector:>14,.0f} perfiles/s)")
+    print(f"aceleración: {t_escalar / t_vector:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
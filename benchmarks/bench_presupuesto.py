@@ -0,0 +1,45 @@
+# bench_presupuesto.py - Totales de presupuesto: recorrer la tabla en cada cambio vs deltas del libro
+#
+# Uso: python benchmarks/bench_presupuesto.py [partidas] [cambios]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from presupuesto import LibroPresupuesto
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    cambios = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    rng = random.Random(42)
+    ediciones = [(f"Partida {rng.randrange(n)}", round(rng.uniform(0, 10_000), 2)) for _ in range(cambios)]
+
+    # Antes: dict de partidas y suma completa después de cada cambio
+    tabla = {f"Partida {i}": {"valor": 0.0, "deuda": 0.0} for i in range(n)}
+    inicio = time.perf_counter()
+    for nombre, monto in ediciones:
+        tabla[nombre]["valor"] = monto
+        total = {"valor": 0.0, "deuda": 0.0}
+        for fila in tabla.values():
+            total["valor"] += fila["valor"]
+            total["deuda"] += fila["deuda"]
+    t_suma = time.perf_counter() - inicio
+
+    libro = LibroPresupuesto([(f"Partida {i}", "") for i in range(n)], campos=("valor", "deuda"))
+    inicio = time.perf_counter()
+    for nombre, monto in ediciones:
+        libro.actualizar(nombre, "valor", monto)
+        totales = libro.totales()
+    t_libro = time.perf_counter() - inicio
+
+    assert abs(totales["valor"] - total["valor"]) < 0.01, "los totales no coinciden"
+    print(f"{n} partidas, {cambios:,} cambios")
+    print(f"suma completa: {t_suma * 1e6 / cambios:8.2f} µs/cambio")
+    print(f"libro (delta): {t_libro * 1e6 / cambios:8.2f} µs/cambio  ({t_suma / t_libro:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# bench_reportes.py - Reportes PDF por segundo: reporte de una página vs plan de IA largo,
+# y escalado según la cantidad de procesos
+#
+# Uso: python benchmarks/bench_reportes.py [reportes]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analisis import analizar_finanzas, resumen_analisis
+from reportes import generate_pdf, renderizar_en_paralelo
+
+PLAN_LARGO = "\n".join(
+    f"{i}. Estrategia de inversión inmobiliaria con metas a corto, mediano y largo plazo." for i in range(1, 400)
+)
+
+
+def trabajos(n):
+    for i in range(n):
+        resultado = analizar_finanzas(4000.0 + i, 2500.0, 80000.0, 15000.0)
+        yield (
+            f"reporte_{i}.pdf",
+            {"nombre": f"Usuario {i}", "edad": 35, "email": f"user{i}@investly.com"},
+            {"ingresos": resultado.ingresos, "gastos": resultado.gastos,
+             "activos": resultado.activos, "pasivos": resultado.pasivos},
+            {"perfil_inversion": {"nivel": resultado.perfil, "descripcion": resultado.descripcion},
+             "resumen": resumen_analisis(resultado)},
+        )
+
+
+def reportes_por_segundo(usuario, finanzas, analisis, segundos=2.0):
+    n = 0
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < segundos:
+        generate_pdf(usuario, finanzas, analisis)
+        n += 1
+    return n / (time.perf_counter() - inicio)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+
+    _, usuario, finanzas, analisis = next(trabajos(1))
+    print(f"una página:      {reportes_por_segundo(usuario, finanzas, analisis):>8,.1f} reportes/s")
+    analisis = dict(analisis, plan_trabajo=PLAN_LARGO, recomendaciones_cursos="Curso Avanzado de Estrategias Inmobiliarias")
+    print(f"plan de IA largo: {reportes_por_segundo(usuario, finanzas, analisis):>8,.1f} reportes/s")
+    print()
+
+    workers = 1
+    base = None
+    print(f"{'procesos':>8} {'reportes/s':>12} {'escalado':>9}")
+    while workers <= (os.cpu_count() or 1):
+        inicio = time.perf_counter()
+        renderizar_en_paralelo(trabajos(n), lambda nombre, pdf: None, workers=workers)
+        por_segundo = n / (time.perf_counter() - inicio)
+        base = base or por_segundo
+        print(f"{workers:>8} {por_segundo:>12,.1f} {por_segundo / base:>8.2f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
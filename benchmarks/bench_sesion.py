@@ -0,0 +1,71 @@
+# bench_sesion.py - Memoria por sesión de los datos de presupuesto: dicts anidados vs LibroPresupuesto
+#
+# Uso: python benchmarks/bench_sesion.py [sesiones]
+import os
+import pickle
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from presupuesto import LibroPresupuesto
+
+# (tabla, partidas, campos) como en APPOPTIMAV1: activos, pasivos, ingresos y gastos
+TABLAS = (
+    ("activos", 13, ("valor", "deuda")),
+    ("pasivos", 7, ("valor", "deuda")),
+    ("ingresos", 3, ("valor",)),
+    ("gastos", 10, ("valor",)),
+)
+AYUDA = "Texto de ayuda compartido por todas las sesiones"
+# Los nombres son literales del script: los mismos objetos en todas las sesiones
+NOMBRES = [f"Partida {i}" for i in range(max(n for _, n, _ in TABLAS))]
+
+
+def sesion_dicts(rng):
+    """Representación anterior: {'Partida': {'valor': ..., 'deuda': ...}} por tabla"""
+    sesion = {}
+    for tabla, n, campos in TABLAS:
+        filas = {}
+        for i in range(n):
+            fila = {campo: round(rng.uniform(0, 100_000), 2) for campo in campos}
+            if len(campos) == 1:
+                fila["help"] = AYUDA
+            filas[NOMBRES[i]] = fila
+        sesion[tabla] = filas
+    return sesion
+
+
+def sesion_libros(rng):
+    sesion = {}
+    for tabla, n, campos in TABLAS:
+        libro = LibroPresupuesto([(NOMBRES[i], AYUDA) for i in range(n)], campos=campos)
+        for nombre in libro:
+            for campo in campos:
+                libro.actualizar(nombre, campo, round(rng.uniform(0, 100_000), 2))
+        sesion[tabla] = libro
+    return sesion
+
+
+def medir(nombre, crear, sesiones):
+    rng = random.Random(42)
+    tracemalloc.start()
+    datos = [crear(rng) for _ in range(sesiones)]
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    serializado = len(pickle.dumps(datos[0]))
+    print(f"{nombre:<18} {memoria / sesiones:>8,.0f} bytes/sesión en memoria  {serializado:>6,} bytes serializada")
+    return memoria
+
+
+def main():
+    sesiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    print(f"{sesiones:,} sesiones, {sum(n for _, n, _ in TABLAS)} partidas cada una")
+    antes = medir("dicts anidados", sesion_dicts, sesiones)
+    despues = medir("LibroPresupuesto", sesion_libros, sesiones)
+    print(f"reducción: {1 - despues / antes:.0%}")
+
+
+if __name__ == "__main__":
+    main()
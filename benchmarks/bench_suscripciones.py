@@ -0,0 +1,103 @@
+# bench_suscripciones.py - Consultas de estado Pro por segundo y webhook de Stripe simulado
+#
+# Uso: python benchmarks/bench_suscripciones.py [usuarios] [consultas]
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_pool
+from migrations import migrate, INVESTLY_MIGRATIONS
+from suscripciones import RUTA_WEBHOOK, CacheSuscripciones, iniciar_webhook
+
+SECRETO = "whsec_prueba"
+PUERTO = 8791
+
+
+def estado_sin_cache(path, email):
+    """Ruta anterior de NewAPP*.py: consulta y strptime en cada rerun"""
+    with get_pool(path).connection() as conn:
+        result = conn.execute(
+            "SELECT subscription_status, subscription_end FROM users WHERE email = ?", (email,)
+        ).fetchone()
+    if result and result[0]:
+        if result[1] and datetime.strptime(result[1], '%Y-%m-%d') > datetime.now():
+            return True
+    return False
+
+
+def enviar_evento(tipo, objeto, secreto=SECRETO):
+    """Emisor de webhooks de prueba: firma el evento como Stripe (t=...,v1=HMAC-SHA256)"""
+    payload = json.dumps({"id": "evt_prueba", "object": "event", "type": tipo, "data": {"object": objeto}})
+    marca = int(time.time())
+    firma = hmac.new(secreto.encode(), f"{marca}.{payload}".encode(), hashlib.sha256).hexdigest()
+    solicitud = urllib.request.Request(
+        f"http://127.0.0.1:{PUERTO}{RUTA_WEBHOOK}",
+        data=payload.encode(),
+        headers={"Content-Type": "application/json", "Stripe-Signature": f"t={marca},v1={firma}"},
+    )
+    try:
+        with urllib.request.urlopen(solicitud) as respuesta:
+            return respuesta.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def medir(nombre, fn, emails):
+    inicio = time.perf_counter()
+    for email in emails:
+        fn(email)
+    duracion = time.perf_counter() - inicio
+    print(f"{nombre:<24} {len(emails) / duracion:>12,.0f} consultas/s")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    consultas = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    rng = random.Random(42)
+    # Pocos usuarios activos a la vez, como en los reruns de la app
+    activos = [f"usuario{rng.randrange(n)}@ejemplo.com" for _ in range(500)]
+    emails = [rng.choice(activos) for _ in range(consultas)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "investly.db")
+        migrate(path, INVESTLY_MIGRATIONS)
+        with get_pool(path).transaction() as conn:
+            conn.executemany(
+                "INSERT INTO users (email, subscription_status, subscription_end) VALUES (?, ?, ?)",
+                ((f"usuario{i}@ejemplo.com", i % 2, "2099-12-31") for i in range(n)),
+            )
+        cache = CacheSuscripciones(path)
+        medir("sin caché (SQL+strptime)", lambda e: estado_sin_cache(path, e), emails)
+        medir("CacheSuscripciones", cache.esta_activa, emails)
+        print(f"  aciertos de caché: {cache.estadisticas()['hit_rate']:.1%}")
+
+        # Webhook: un usuario gratuito paga y debe verse Pro sin esperar el TTL
+        servidor = iniciar_webhook(path, SECRETO, cache, port=PUERTO)
+        email = "usuario0@ejemplo.com"
+        assert not cache.esta_activa(email)
+        assert enviar_evento("checkout.session.completed", {"mode": "subscription"}, secreto="otro") == 400
+        inicio = time.perf_counter()
+        codigo = enviar_evento("checkout.session.completed", {
+            "mode": "subscription", "payment_status": "paid", "customer_email": email,
+            "metadata": {"user_email": email},
+        })
+        latencia = (time.perf_counter() - inicio) * 1000
+        assert codigo == 200 and cache.esta_activa(email), "el webhook no actualizó la suscripción"
+        assert enviar_evento("customer.subscription.deleted", {"metadata": {"user_email": email}}) == 200
+        assert not cache.esta_activa(email), "la cancelación no invalidó el caché"
+        print(f"webhook checkout -> Pro: {latencia:.1f} ms (firma inválida rechazada, cancelación aplicada)")
+        servidor.shutdown()
+        get_pool(path).close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# fake_openai.py - Servidor local que imita /v1/chat/completions para pruebas sin costo
+#
+# Uso:
+#   python benchmarks/fake_openai.py --port 8765 --latencia 2.0
+#   y en .streamlit/secrets.toml: OPENAI_BASE_URL = "http://127.0.0.1:8765/v1"
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESPUESTA = (
+    "1. Diagnóstico: tu flujo de caja permite ahorrar para una cuota inicial.\n"
+    "2. Flujo de caja: reduce gastos variables un 10% y destina el excedente a inversión.\n"
+    "3. Deudas: prioriza las tarjetas de crédito con mayor tasa.\n"
+    "4. Inversión: comienza con una co-inversión o un apartamento pequeño en arriendo.\n"
+    "5. Metas: 3 meses fondo de emergencia, 1 año cuota inicial, 5+ años segunda propiedad.\n"
+)
+# Tokens de la respuesta: una palabra por token, con su espacio delante salvo la primera
+PALABRAS = RESPUESTA.split(" ")
+TOKENS = PALABRAS[:1] + [" " + palabra for palabra in PALABRAS[1:]]
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    latencia = 1.0
+    retardo_token = 0.02
+    contador = 0
+    _lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        cuerpo = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with FakeOpenAIHandler._lock:
+            FakeOpenAIHandler.contador += 1
+        time.sleep(self.latencia)
+
+        if cuerpo.get("stream"):
+            self._transmitir(cuerpo)
+            return
+
+        # Sin stream el modelo genera los mismos tokens, pero nada llega hasta el último
+        time.sleep(self.retardo_token * len(TOKENS))
+        respuesta = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": cuerpo.get("model", "gpt-3.5-turbo"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": RESPUESTA},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+        datos = json.dumps(respuesta).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _transmitir(self, cuerpo):
+        """Responder como Server-Sent Events, una palabra por chunk"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        base = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": cuerpo.get("model", "gpt-3.5-turbo"),
+        }
+        inicio = dict(base, choices=[{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+        self.wfile.write(f"data: {json.dumps(inicio)}\n\n".encode())
+        for token in TOKENS:
+            time.sleep(self.retardo_token)
+            chunk = dict(base, choices=[{"index": 0, "delta": {"content": token}, "finish_reason": None}])
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        fin = dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        self.wfile.write(f"data: {json.dumps(fin)}\n\ndata: [DONE]\n\n".encode())
+        self.wfile.flush()
+
+
+def iniciar(port=8765, latencia=1.0, retardo_token=0.02):
+    """Arrancar el servidor en un hilo y devolverlo (para scripts de medición)"""
+    FakeOpenAIHandler.latencia = latencia
+    FakeOpenAIHandler.retardo_token = retardo_token
+    servidor = ThreadingHTTPServer(("127.0.0.1", port), FakeOpenAIHandler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor OpenAI falso para Investly")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=1.0, help="segundos antes del primer token")
+    parser.add_argument("--retardo-token", type=float, default=0.02, help="segundos por token generado (con y sin stream)")
+    args = parser.parse_args()
+    FakeOpenAIHandler.latencia = args.latencia
+    FakeOpenAIHandler.retardo_token = args.retardo_token
+    print(f"Servidor OpenAI falso en http://127.0.0.1:{args.port}/v1")
+    ThreadingHTTPServer(("127.0.0.1", args.port), FakeOpenAIHandler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# fake_stripe.py - Servidor local que imita POST /v1/checkout/sessions (sustituto de stripe-mock)
+#
+# Uso:
+#   python benchmarks/fake_stripe.py --port 12111 --latencia 0.15 --latencia-conexion 0.1
+#   y ClienteStripe(api_key, api_base="http://127.0.0.1:12111")
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class FakeStripeHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 para que los clientes puedan reutilizar la conexión como con api.stripe.com
+    protocol_version = "HTTP/1.1"
+    latencia = 0.15
+    latencia_conexion = 0.1
+    fallos = 0.0
+    conexiones = 0
+    solicitudes = 0
+    _lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        # Una instancia por conexión TCP: aquí se cobra el costo del handshake TCP + TLS
+        super().setup()
+        # Encabezados y cuerpo salen en escrituras separadas: sin TCP_NODELAY, Nagle + ACK diferido suman ~40 ms
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with FakeStripeHandler._lock:
+            FakeStripeHandler.conexiones += 1
+        time.sleep(self.latencia_conexion)
+
+    def _responder(self, codigo, cuerpo):
+        datos = json.dumps(cuerpo).encode()
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.send_header("Request-Id", f"req_{uuid.uuid4().hex[:14]}")
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_POST(self):
+        params = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+        with FakeStripeHandler._lock:
+            FakeStripeHandler.solicitudes += 1
+        time.sleep(self.latencia)
+        if self.path != "/v1/checkout/sessions":
+            self._responder(404, {"error": {"type": "invalid_request_error", "message": "Unrecognized request URL"}})
+            return
+        if random.random() < self.fallos:
+            self._responder(500, {"error": {"type": "api_error", "message": "Fallo simulado"}})
+            return
+        sesion_id = f"cs_test_{uuid.uuid4().hex}"
+        self._responder(200, {
+            "id": sesion_id,
+            "object": "checkout.session",
+            "mode": params.get("mode", ["payment"])[0],
+            "customer_email": params.get("customer_email", [None])[0],
+            "url": f"https://checkout.stripe.com/c/pay/{sesion_id}",
+            "expires_at": int(time.time()) + 24 * 3600,
+        })
+
+
+def iniciar(port=12111, latencia=0.15, latencia_conexion=0.1, fallos=0.0):
+    """Arrancar el servidor en un hilo y devolverlo (para scripts de medición)"""
+    FakeStripeHandler.latencia = latencia
+    FakeStripeHandler.latencia_conexion = latencia_conexion
+    FakeStripeHandler.fallos = fallos
+    servidor = ThreadingHTTPServer(("127.0.0.1", port), FakeStripeHandler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor Stripe falso para Investly")
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--latencia", type=float, default=0.15, help="segundos por solicitud")
+    parser.add_argument("--latencia-conexion", type=float, default=0.1, help="segundos por conexión nueva (handshake)")
+    parser.add_argument("--fallos", type=float, default=0.0, help="fracción de solicitudes que responden 500")
+    args = parser.parse_args()
+    FakeStripeHandler.latencia = args.latencia
+    FakeStripeHandler.latencia_conexion = args.latencia_conexion
+    FakeStripeHandler.fallos = args.fallos
+    print(f"Servidor Stripe falso en http://127.0.0.1:{args.port}")
+    ThreadingHTTPServer(("127.0.0.1", args.port), FakeStripeHandler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
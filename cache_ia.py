@@ -0,0 +1,99 @@
+# cache_ia.py - Caché persistente de respuestas de IA en SQLite (TTL + desalojo LRU)
+import hashlib
+import json
+import math
+import threading
+import time
+
+from db import get_pool
+from migrations import migrate, CACHE_IA_MIGRATIONS
+
+
+# Cifras significativas de los montos del prompt: con 3 el plan cita montos a menos de 0,5%
+# de los del usuario (1.050 sigue siendo 1.050); con 2 el error llega al 5% y se cachea más
+CIFRAS_MONTO = 3
+
+
+def agrupar_monto(valor, cifras=CIFRAS_MONTO):
+    """Redondear un monto a `cifras` cifras significativas (5.024 -> 5.020, 123.456 -> 123.000)
+
+    Perfiles en el mismo rango producen el mismo prompt y comparten la respuesta cacheada.
+    """
+    if not valor:
+        return 0.0
+    magnitud = int(math.floor(math.log10(abs(valor))))
+    return float(round(valor, cifras - 1 - magnitud))
+
+
+def clave_respuesta(mensajes, modelo, temperatura):
+    """Hash de contenido de la solicitud: mensajes, modelo y temperatura"""
+    contenido = json.dumps([mensajes, modelo, temperatura], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+class CacheRespuestas:
+    """Respuestas de IA por clave de contenido, con expiración y límite de entradas"""
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entradas=5000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._pool = get_pool(path)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        migrate(path, CACHE_IA_MIGRATIONS)
+
+    def _contar(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, clave):
+        """Respuesta cacheada o None si no existe o expiró"""
+        ahora = time.time()
+        with self._pool.transaction() as conn:
+            fila = conn.execute(
+                "SELECT respuesta, creado FROM llm_cache WHERE clave = ?", (clave,)
+            ).fetchone()
+            if fila is None:
+                self._contar(False)
+                return None
+            if ahora - fila[1] > self.ttl:
+                conn.execute("DELETE FROM llm_cache WHERE clave = ?", (clave,))
+                self._contar(False)
+                return None
+            # Marcar como usada recientemente para el desalojo LRU
+            conn.execute("UPDATE llm_cache SET usado = ? WHERE clave = ?", (ahora, clave))
+        self._contar(True)
+        return fila[0]
+
+    def put(self, clave, modelo, respuesta):
+        """Guardar una respuesta y desalojar las menos usadas si se supera el límite"""
+        ahora = time.time()
+        with self._pool.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (clave, modelo, respuesta, creado, usado) VALUES (?, ?, ?, ?, ?)",
+                (clave, modelo, respuesta, ahora, ahora),
+            )
+            sobrantes = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entradas
+            if sobrantes > 0:
+                conn.execute(
+                    "DELETE FROM llm_cache WHERE clave IN (SELECT clave FROM llm_cache ORDER BY usado LIMIT ?)",
+                    (sobrantes,),
+                )
+
+    def estadisticas(self):
+        """Contadores de aciertos/fallos del proceso y tamaño actual del caché"""
+        with self._pool.connection() as conn:
+            entradas = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entradas": entradas,
+            }
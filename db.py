@@ -0,0 +1,112 @@
+# db.py - Capa de conexiones SQLite compartida por las apps de Investly
+import sqlite3
+import threading
+import queue
+from contextlib import contextmanager
+
+# Pragmas aplicados una sola vez al abrir cada conexión del pool
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Tamaño del caché de sentencias preparadas por conexión
+CACHED_STATEMENTS = 256
+
+
+class ConnectionPool:
+    """Pool de conexiones SQLite reutilizables y seguras entre hilos"""
+
+    def __init__(self, path, size=5, timeout=5.0):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        """Obtener una conexión libre, creando una nueva si el pool no está lleno"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                crear = True
+            else:
+                crear = False
+
+        if crear:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        return self._pool.get(timeout=self.timeout)
+
+    def release(self, conn):
+        """Devolver una conexión al pool descartando transacciones abiertas"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._pool.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        """Conexión prestada del pool para lecturas"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Conexión prestada del pool con commit/rollback automático"""
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+    def close(self):
+        """Cerrar todas las conexiones inactivas del pool"""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path, size=5):
+    """Obtener el pool del proceso para una base de datos (uno por ruta)"""
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = ConnectionPool(path, size=size)
+            _pools[path] = pool
+        return pool
@@ -0,0 +1,78 @@
+# escenarios.py - Comparación de escenarios "qué pasaría si" evaluados en un solo lote vectorizado
+import numpy as np
+
+from analisis import NIVELES, clasificar_perfiles, evaluar_finanzas, evaluar_finanzas_lote
+
+# Interés anual que deja de pagarse por cada peso de deuda abonado
+TASA_DEUDA = 0.18
+# Meses de flujo de caja acumulados en el patrimonio proyectado
+HORIZONTE_MESES = 12
+
+COLUMNAS = (
+    "variacion_ingreso", "recorte_gasto", "pago_deuda", "ingresos", "gastos", "activos", "pasivos",
+    "flujo_caja", "patrimonio_neto", "patrimonio_proyectado", "mejora_flujo", "nivel",
+)
+
+
+def rango_porcentual(minimo, maximo, paso=1):
+    """Fracciones de `minimo`% a `maximo`% (ambos incluidos) cada `paso` puntos"""
+    return np.arange(minimo, maximo + paso / 2, paso) / 100
+
+
+def rejilla_escenarios(variaciones_ingreso, recortes_gasto, pagos_deuda):
+    """Todas las combinaciones de las tres palancas como tres arrays planos del mismo largo"""
+    v, r, p = np.meshgrid(variaciones_ingreso, recortes_gasto, pagos_deuda, indexing="ij")
+    return v.ravel(), r.ravel(), p.ravel()
+
+
+def evaluar_escenarios(ingresos, gastos, activos, pasivos, variaciones_ingreso, recortes_gasto, pagos_deuda,
+                       tasa_deuda=TASA_DEUDA, meses=HORIZONTE_MESES):
+    """Tabla de comparación (dict columna -> array) para la rejilla de escenarios
+
+    Cada escenario cambia los ingresos en un porcentaje, recorta los gastos y abona una
+    fracción de los pasivos con activos (hasta donde alcancen). El abono no cambia el
+    patrimonio, pero ahorra intereses y mejora el flujo. Flujo y patrimonio salen de
+    evaluar_finanzas_lote, igual que en el análisis por lotes; el nivel (índice de NIVELES)
+    es el del perfil al cabo de `meses`, con el flujo del escenario ya acumulado.
+    """
+    v, r, p = rejilla_escenarios(variaciones_ingreso, recortes_gasto, pagos_deuda)
+    abono = np.minimum(p * pasivos, max(activos, 0.0))
+    ingresos_e = ingresos * (1 + v)
+    gastos_e = gastos * (1 - r) - abono * (tasa_deuda / 12)
+    activos_e = activos - abono
+    pasivos_e = pasivos - abono
+    flujo, patrimonio, _ = evaluar_finanzas_lote(ingresos_e, gastos_e, activos_e, pasivos_e)
+    proyectado = patrimonio + flujo * meses
+    flujo_base, _, _ = evaluar_finanzas(ingresos, gastos, activos, pasivos)
+    return dict(zip(COLUMNAS, (
+        v, r, p, ingresos_e, gastos_e, activos_e, pasivos_e,
+        flujo, patrimonio, proyectado, flujo - flujo_base, clasificar_perfiles(proyectado, flujo),
+    )))
+
+
+def _fila(tabla, i):
+    return {columna: valores[i].item() for columna, valores in tabla.items()}
+
+
+def mejores_escenarios(tabla, n=10):
+    """Las `n` filas (dicts) de mejor nivel y, dentro de cada nivel, mayor patrimonio proyectado"""
+    orden = np.lexsort((-tabla["patrimonio_proyectado"], tabla["nivel"]))[:n]
+    return [_fila(tabla, i) for i in orden]
+
+
+def conteo_niveles(tabla):
+    """Cantidad de escenarios que alcanzan cada nivel, en el orden de NIVELES"""
+    return dict(zip(NIVELES.tolist(), np.bincount(tabla["nivel"], minlength=len(NIVELES)).tolist()))
+
+
+def menor_cambio(tabla, nivel):
+    """Fila (dict) del escenario que alcanza al menos `nivel` (índice de NIVELES) con menos esfuerzo, o None
+
+    El esfuerzo suma el aumento de ingreso, el recorte de gasto y la fracción de deuda abonada;
+    una caída de ingreso no cuenta como esfuerzo. A igual esfuerzo gana el mayor patrimonio proyectado.
+    """
+    candidatos = np.flatnonzero(tabla["nivel"] <= nivel)
+    if not len(candidatos):
+        return None
+    esfuerzo = np.maximum(tabla["variacion_ingreso"][candidatos], 0) + tabla["recorte_gasto"][candidatos] + tabla["pago_deuda"][candidatos]
+    return _fila(tabla, candidatos[np.lexsort((-tabla["patrimonio_proyectado"][candidatos], esfuerzo))[0]])
@@ -0,0 +1,51 @@
+# estilos.py - Hoja de estilos y encabezado de Investly precalculados una vez por proceso
+import hashlib
+import os
+import re
+
+RUTA_CSS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "investly.css")
+
+# Ruta pública de static/ cuando server.enableStaticServing está activo (.streamlit/config.toml)
+URL_CSS = "app/static/investly.css"
+
+ENCABEZADO = """
+<div class="header-container">
+    <div>
+        <h1 style="margin:0;color:#1E3A8A;">Investly</h1>
+        <p class="tagline">Tu perfil. Tu estrategia. Tu patrimonio.</p>
+    </div>
+</div>
+<div class="calculator-container">
+    Esta herramienta te ayudará a analizar tu capacidad para invertir en bienes raíces,
+    crear un plan de acción y establecer metas claras para construir patrimonio inmobiliario.
+</div>
+"""
+
+
+def minificar_css(css):
+    """CSS sin comentarios ni espacios innecesarios"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def minificar_html(html):
+    """HTML en una sola línea (un único bloque HTML para st.markdown)"""
+    return re.sub(r"\s+", " ", re.sub(r">\s+<", "><", html)).strip()
+
+
+with open(RUTA_CSS, encoding="utf-8") as f:
+    CSS = minificar_css(f.read())
+
+# Versión por contenido: el navegador vuelve a descargar la hoja solo si cambia
+VERSION_CSS = hashlib.sha256(CSS.encode("utf-8")).hexdigest()[:12]
+
+ESTILO_EN_LINEA = f"<style>{CSS}</style>"
+ENLACE_CSS = f'<link rel="stylesheet" href="{URL_CSS}?v={VERSION_CSS}">'
+ENCABEZADO_HTML = minificar_html(ENCABEZADO)
+
+
+def cabecera_html(servir_estatico):
+    """Estilos y encabezado en un solo bloque: enlace a la hoja estática o CSS minificado en línea"""
+    return (ENLACE_CSS if servir_estatico else ESTILO_EN_LINEA) + ENCABEZADO_HTML
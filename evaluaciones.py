@@ -0,0 +1,69 @@
+# evaluaciones.py - Historial de evaluaciones por usuario: JSON compacto versionado y paginación por cursor
+import json
+
+from db import get_pool
+
+# Campos de cada versión del esquema, en el orden en que se guardan. Solo se agregan
+# versiones nuevas: las evaluaciones ya guardadas se siguen leyendo con su versión.
+ESQUEMAS = {
+    1: ("plan", "monto", "riesgo", "objetivo"),
+}
+VERSION_ACTUAL = 1
+TAMANO_PAGINA = 20
+
+# Keyset sobre idx_evaluations_email_fecha (user_email, created_at, y el id implícito como
+# desempate): cada página es una búsqueda en el índice, sin OFFSET que recorra las anteriores
+SQL_PRIMERA_PAGINA = (
+    "SELECT id, evaluation_data, created_at FROM evaluations WHERE user_email = ? "
+    "ORDER BY created_at DESC, id DESC LIMIT ?"
+)
+SQL_PAGINA = (
+    "SELECT id, evaluation_data, created_at FROM evaluations WHERE user_email = ? "
+    "AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?"
+)
+
+
+def serializar(evaluacion):
+    """[versión, valores...] en JSON sin espacios: los nombres de campo no se repiten en cada fila"""
+    valores = [evaluacion.get(campo) for campo in ESQUEMAS[VERSION_ACTUAL]]
+    return json.dumps([VERSION_ACTUAL, *valores], separators=(",", ":"), ensure_ascii=False)
+
+
+def deserializar(datos):
+    """dict de campos de una evaluación guardada con cualquier versión del esquema"""
+    version, *valores = json.loads(datos)
+    return dict(zip(ESQUEMAS[version], valores))
+
+
+def guardar_evaluacion(path, email, evaluacion):
+    """Agregar una evaluación al historial del usuario y devolver su id"""
+    with get_pool(path).transaction() as conn:
+        conn.execute("INSERT OR IGNORE INTO users (email) VALUES (?)", (email,))
+        return conn.execute(
+            "INSERT INTO evaluations (user_email, evaluation_data) VALUES (?, ?)",
+            (email, serializar(evaluacion)),
+        ).lastrowid
+
+
+def pagina_evaluaciones(path, email, cursor=None, limite=TAMANO_PAGINA):
+    """Evaluaciones del usuario de la más reciente a la más antigua, a partir de `cursor`
+
+    Devuelve (evaluaciones, cursor de la página siguiente o None si no hay más). Cada
+    evaluación es el dict de sus campos más "id" y "fecha".
+    """
+    with get_pool(path).connection() as conn:
+        if cursor is None:
+            filas = conn.execute(SQL_PRIMERA_PAGINA, (email, limite + 1)).fetchall()
+        else:
+            filas = conn.execute(SQL_PAGINA, (email, *cursor, limite + 1)).fetchall()
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = (filas[-1][2], filas[-1][0])
+    evaluaciones = []
+    for id_, datos, fecha in filas:
+        evaluacion = deserializar(datos)
+        evaluacion["id"] = id_
+        evaluacion["fecha"] = fecha
+        evaluaciones.append(evaluacion)
+    return evaluaciones, siguiente
@@ -0,0 +1,150 @@
+# ia.py - Llamadas a OpenAI para los planes de Investly, ejecutadas fuera del hilo de Streamlit
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from cache_ia import clave_respuesta
+
+MODELO_PLAN = "gpt-3.5-turbo"
+TEMPERATURA_PLAN = 0.7
+SYSTEM_PROMPT_PLAN = "Eres un asesor experto en inversión en bienes raíces. Responde en español con enfoque práctico para inversión inmobiliaria."
+
+
+class PoolSaturado(RuntimeError):
+    """No hay cupo para más trabajos de IA en curso"""
+
+
+class PoolTrabajos:
+    """Pool de hilos acotado: como máximo `max_pendientes` trabajos en curso o en cola"""
+
+    def __init__(self, max_workers=4, max_pendientes=16):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="investly-ia")
+        self._cupos = threading.BoundedSemaphore(max_pendientes)
+
+    def enviar(self, fn, *args, **kwargs):
+        """Encolar un trabajo y devolver su Future; PoolSaturado si no hay cupo"""
+        if not self._cupos.acquire(blocking=False):
+            raise PoolSaturado("Demasiadas solicitudes de IA en curso. Intenta de nuevo en unos segundos.")
+        try:
+            futuro = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._cupos.release()
+            raise
+        futuro.add_done_callback(lambda _: self._cupos.release())
+        return futuro
+
+    def cerrar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class TrabajoPlan:
+    """Handle de un plan en generación: su Future y el texto recibido hasta ahora"""
+
+    def __init__(self):
+        self.futuro = None
+        self._partes = []
+        self._lock = threading.Lock()
+
+    def agregar(self, delta):
+        with self._lock:
+            self._partes.append(delta)
+
+    def texto(self):
+        with self._lock:
+            return "".join(self._partes)
+
+    def done(self):
+        return self.futuro.done()
+
+
+class SingleFlight:
+    """Comparte un único trabajo entre solicitudes idénticas mientras está en curso
+
+    El lock solo protege el registro: `lanzar()` (lectura del caché en disco y envío al
+    pool) corre fuera de él, así una clave lenta no frena a las demás. Mientras se lanza,
+    la clave guarda un Future que resuelve al trabajo para quienes lleguen entretanto.
+    """
+
+    def __init__(self):
+        self._en_curso = {}
+        self._lock = threading.Lock()
+
+    def hacer(self, clave, lanzar):
+        """Devolver el trabajo en curso para `clave` o crear uno nuevo con `lanzar()`"""
+        with self._lock:
+            registro = self._en_curso.get(clave)
+            propio = registro is None
+            if propio:
+                registro = self._en_curso[clave] = Future()
+        if not propio:
+            # Solo espera a que termine de lanzarse, no a que termine el trabajo
+            return registro.result()
+        try:
+            trabajo = lanzar()
+        except BaseException as e:
+            self._terminar(clave, registro)
+            registro.set_exception(e)
+            raise
+        registro.set_result(trabajo)
+        trabajo.futuro.add_done_callback(lambda _: self._terminar(clave, registro))
+        return trabajo
+
+    def _terminar(self, clave, registro):
+        with self._lock:
+            if self._en_curso.get(clave) is registro:
+                del self._en_curso[clave]
+
+
+def mensajes_plan(prompt):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT_PLAN},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def clave_plan(prompt):
+    """Clave de contenido del plan (mensajes, modelo y temperatura)"""
+    return clave_respuesta(mensajes_plan(prompt), MODELO_PLAN, TEMPERATURA_PLAN)
+
+
+def iniciar_plan(pool, client, prompt, cache=None):
+    """Lanzar un plan por streaming en el pool y devolver su TrabajoPlan
+
+    Si `cache` tiene la respuesta, el trabajo se devuelve ya completado sin tocar el pool.
+    """
+    trabajo = TrabajoPlan()
+    if cache is not None:
+        respuesta = cache.get(clave_plan(prompt))
+        if respuesta is not None:
+            trabajo.agregar(respuesta)
+            trabajo.futuro = Future()
+            trabajo.futuro.set_result(respuesta)
+            return trabajo
+    trabajo.futuro = pool.enviar(transmitir_plan, client, prompt, trabajo, cache)
+    return trabajo
+
+
+def transmitir_plan(client, prompt, trabajo, cache=None):
+    """Pedir el plan con stream=True acumulando los tokens en `trabajo` a medida que llegan"""
+    stream = client.chat.completions.create(
+        model=MODELO_PLAN,
+        messages=mensajes_plan(prompt),
+        temperature=TEMPERATURA_PLAN,
+        stream=True
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            trabajo.agregar(chunk.choices[0].delta.content)
+    texto = trabajo.texto()
+    if cache is not None and texto:
+        cache.put(clave_plan(prompt), MODELO_PLAN, texto)
+    return texto
+
+
+def solicitar_plan(client, prompt):
+    """Pedir el plan a OpenAI y devolver el texto (sin llamadas a Streamlit)"""
+    response = client.chat.completions.create(
+        model=MODELO_PLAN,
+        messages=mensajes_plan(prompt),
+        temperature=TEMPERATURA_PLAN
+    )
+    return response.choices[0].message.content
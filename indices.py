@@ -0,0 +1,84 @@
+# indices.py - Consultas calientes y el índice con que SQLite debe resolver cada una
+#
+# Uso:
+#   python indices.py --investly investly.db --usuarios usuarios.db   # verificar planes en bases reales
+import argparse
+import sys
+
+from db import get_pool
+from evaluaciones import SQL_PAGINA, SQL_PRIMERA_PAGINA
+from migrations import migrate, INVESTLY_MIGRATIONS, USUARIOS_MIGRATIONS
+
+# (nombre, SQL, fragmento esperado en EXPLAIN QUERY PLAN)
+CONSULTAS_INVESTLY = (
+    (
+        "suscripción por email",
+        "SELECT subscription_status, subscription_end FROM users WHERE email = ?",
+        "SEARCH users USING PRIMARY KEY (email=?)",
+    ),
+    (
+        "historial de evaluaciones (primera página)",
+        SQL_PRIMERA_PAGINA,
+        "SEARCH evaluations USING INDEX idx_evaluations_email_fecha (user_email=?)",
+    ),
+    (
+        "historial de evaluaciones (página siguiente)",
+        SQL_PAGINA,
+        "SEARCH evaluations USING INDEX idx_evaluations_email_fecha (user_email=? AND created_at<?)",
+    ),
+)
+
+CONSULTAS_USUARIOS = (
+    (
+        "usuario por email",
+        "SELECT id FROM usuarios WHERE email = ?",
+        "SEARCH usuarios USING COVERING INDEX idx_usuarios_email (email=?)",
+    ),
+    (
+        "finanzas por usuario",
+        "SELECT id, ingresos_mensuales, gastos_mensuales, activos_totales, pasivos_totales FROM finanzas WHERE usuario_id = ?",
+        "SEARCH finanzas USING INDEX idx_finanzas_usuario (usuario_id=?)",
+    ),
+)
+
+
+def plan_consulta(conn, sql):
+    """Pasos de EXPLAIN QUERY PLAN de una consulta (parámetros en NULL)"""
+    return [fila[3] for fila in conn.execute(f"EXPLAIN QUERY PLAN {sql}", (None,) * sql.count("?"))]
+
+
+def verificar_planes(path, consultas):
+    """Consultas cuyo plan no usa el índice esperado o recorre/ordena la tabla: [(nombre, plan)]"""
+    fallas = []
+    with get_pool(path).connection() as conn:
+        for nombre, sql, esperado in consultas:
+            plan = plan_consulta(conn, sql)
+            if esperado not in plan or any(paso.startswith("SCAN") or "TEMP B-TREE" in paso for paso in plan):
+                fallas.append((nombre, plan))
+    return fallas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verificar que las consultas calientes usan sus índices")
+    parser.add_argument("--investly", help="base de NewAPP*.py (por ejemplo investly.db)")
+    parser.add_argument("--usuarios", help="base de APPOPTIMAV1.py (por ejemplo usuarios.db)")
+    args = parser.parse_args(argv)
+    if not args.investly and not args.usuarios:
+        parser.error("indica --investly y/o --usuarios")
+
+    fallas = []
+    for path, migraciones, consultas in (
+        (args.investly, INVESTLY_MIGRATIONS, CONSULTAS_INVESTLY),
+        (args.usuarios, USUARIOS_MIGRATIONS, CONSULTAS_USUARIOS),
+    ):
+        if path:
+            migrate(path, migraciones)
+            fallas += verificar_planes(path, consultas)
+    for nombre, plan in fallas:
+        print(f"{nombre}: {' | '.join(plan)}", file=sys.stderr)
+    print("planes correctos" if not fallas else f"{len(fallas)} consultas sin el índice esperado", file=sys.stderr)
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# ingesta.py - Alta de usuarios y sus finanzas en usuarios.db: fila a fila (app) o por lotes (CLI)
+#
+# Uso:
+#   python ingesta.py usuarios.csv                     # columnas nombre, edad, email, telefono,
+#   python ingesta.py usuarios.jsonl --db otra.db      # ingresos_mensuales, gastos_mensuales, ...
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+from itertools import islice
+
+from db import get_pool
+from migrations import migrate, USUARIOS_MIGRATIONS
+from moneda import parse_currency
+
+COLUMNAS_USUARIO = ("nombre", "edad", "email", "telefono")
+COLUMNAS_FINANZAS = ("ingresos_mensuales", "gastos_mensuales", "activos_totales", "pasivos_totales")
+EDAD_MINIMA = 18
+
+SQL_USUARIO = "INSERT INTO usuarios (id, nombre, edad, email, telefono) VALUES (?, ?, ?, ?, ?)"
+SQL_FINANZAS = (
+    "INSERT INTO finanzas (usuario_id, ingresos_mensuales, gastos_mensuales, activos_totales, pasivos_totales) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+def insertar_usuario(conn, nombre, edad, email, telefono):
+    """Insertar un usuario en la transacción de `conn` y devolver su id"""
+    return conn.execute(SQL_USUARIO, (None, nombre, edad, email, telefono)).lastrowid
+
+
+def insertar_finanzas(conn, usuario_id, ingresos, gastos, activos, pasivos):
+    """Insertar una foto de las finanzas de un usuario y devolver su id"""
+    return conn.execute(SQL_FINANZAS, (usuario_id, ingresos, gastos, activos, pasivos)).lastrowid
+
+
+def leer_registros(path):
+    """Diccionarios de un CSV (con encabezado) o de un JSONL, uno por línea"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for linea in f:
+                if linea.strip():
+                    yield json.loads(linea)
+        else:
+            yield from csv.DictReader(f)
+
+
+def leer_monto(valor):
+    """Monto de una celda de CSV/JSONL o de la base: vacío -> 0.0, None si no es un monto válido"""
+    if valor in (None, ""):
+        return 0.0
+    try:
+        monto = float(valor)
+    except (TypeError, ValueError):
+        # Montos con símbolo o separadores ("$1,234.56", "1.234,56"); lo demás no es un monto
+        monto = parse_currency(str(valor), estricto=True)
+    return monto if monto is not None and math.isfinite(monto) else None
+
+
+def _fila(registro):
+    """(usuario, finanzas o None) de un registro, o None si no cumple las reglas del registro en la app"""
+    try:
+        edad = int(registro.get("edad") or 0)
+    except (TypeError, ValueError):
+        return None
+    if not registro.get("nombre") or not registro.get("email") or edad < EDAD_MINIMA:
+        return None
+    usuario = (registro["nombre"], edad, registro["email"], registro.get("telefono") or "")
+    if all(registro.get(columna) in (None, "") for columna in COLUMNAS_FINANZAS):
+        return usuario, None
+    montos = tuple(leer_monto(registro.get(columna)) for columna in COLUMNAS_FINANZAS)
+    if None in montos:
+        return None
+    return usuario, montos
+
+
+def ingerir_lote(path, registros):
+    """Insertar usuarios y sus finanzas en una sola transacción con executemany
+
+    Devuelve (usuarios insertados, filas de finanzas insertadas, registros rechazados).
+    """
+    filas = [_fila(registro) for registro in registros]
+    validas = [fila for fila in filas if fila is not None]
+    if not validas:
+        return 0, 0, len(filas)
+    with get_pool(path).transaction() as conn:
+        # Bloqueo de escritura: los ids se reservan en bloque sin que otro escritor se cruce
+        conn.execute("BEGIN IMMEDIATE")
+        base = conn.execute(
+            "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'usuarios'), 0), "
+            "COALESCE((SELECT MAX(id) FROM usuarios), 0))"
+        ).fetchone()[0]
+        conn.executemany(SQL_USUARIO, ((base + i, *usuario) for i, (usuario, _) in enumerate(validas, start=1)))
+        finanzas = [(base + i, *montos) for i, (_, montos) in enumerate(validas, start=1) if montos is not None]
+        conn.executemany(SQL_FINANZAS, finanzas)
+    return len(validas), len(finanzas), len(filas) - len(validas)
+
+
+def ingerir_archivo(path_db, path_archivo, lote=50000):
+    """Cargar un CSV/JSONL completo en transacciones de `lote` registros; devuelve los totales"""
+    migrate(path_db, USUARIOS_MIGRATIONS)
+    registros = leer_registros(path_archivo)
+    totales = [0, 0, 0]
+    while True:
+        bloque = list(islice(registros, lote))
+        if not bloque:
+            return tuple(totales)
+        for i, cantidad in enumerate(ingerir_lote(path_db, bloque)):
+            totales[i] += cantidad
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cargar usuarios con sus finanzas desde CSV/JSONL")
+    parser.add_argument("entrada", help="CSV o JSONL con columnas de usuarios y finanzas")
+    parser.add_argument("--db", default="usuarios.db", help="base de datos SQLite (por defecto usuarios.db)")
+    parser.add_argument("--lote", type=int, default=50000, help="registros por transacción (por defecto 50000)")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    usuarios, finanzas, rechazados = ingerir_archivo(args.db, args.entrada, args.lote)
+    duracion = time.perf_counter() - inicio
+    print(
+        f"{usuarios} usuarios y {finanzas} finanzas cargados en {duracion:.2f} s "
+        f"({usuarios / duracion if duracion else 0:,.0f} filas/s); {rechazados} rechazados",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# migrations.py - Migraciones de esquema versionadas para las bases SQLite de Investly
+import sqlite3
+
+from db import get_pool
+
+# Cada migración es (versión, descripción, sentencias). Solo se agregan al final:
+# una versión ya publicada nunca se modifica.
+USUARIOS_MIGRATIONS = [
+    (1, "Tablas usuarios y finanzas", [
+        '''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT,
+            edad INTEGER,
+            email TEXT,
+            telefono TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS finanzas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER,
+            ingresos_mensuales REAL,
+            gastos_mensuales REAL,
+            activos_totales REAL,
+            pasivos_totales REAL,
+            FOREIGN KEY(usuario_id) REFERENCES usuarios(id)
+        )
+        ''',
+    ]),
+    (2, "Tabla perfiles con resultados del análisis por lotes", [
+        '''
+        CREATE TABLE IF NOT EXISTS perfiles (
+            finanzas_id INTEGER PRIMARY KEY,
+            usuario_id INTEGER,
+            flujo_caja REAL,
+            patrimonio_neto REAL,
+            perfil TEXT,
+            calculado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(finanzas_id) REFERENCES finanzas(id)
+        )
+        ''',
+    ]),
+    (3, "Índices de búsqueda por email y de finanzas por usuario", [
+        "CREATE INDEX IF NOT EXISTS idx_usuarios_email ON usuarios (email)",
+        "CREATE INDEX IF NOT EXISTS idx_finanzas_usuario ON finanzas (usuario_id)",
+    ]),
+]
+
+INVESTLY_MIGRATIONS = [
+    (1, "Tablas users y evaluations", [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            email TEXT PRIMARY KEY,
+            subscription_status BOOLEAN DEFAULT FALSE,
+            subscription_end DATE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS evaluations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_email TEXT,
+            evaluation_data TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_email) REFERENCES users (email)
+        )
+        ''',
+    ]),
+    (2, "users agrupada por email (WITHOUT ROWID) e índice de evaluaciones por email y fecha", [
+        # La consulta de suscripción por email se resuelve con una sola búsqueda en la clave
+        # primaria, sin el salto del autoíndice a la fila.
+        '''
+        CREATE TABLE users_nueva (
+            email TEXT PRIMARY KEY,
+            subscription_status BOOLEAN DEFAULT FALSE,
+            subscription_end DATE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+        ''',
+        '''
+        INSERT INTO users_nueva (email, subscription_status, subscription_end, created_at)
+        SELECT email, subscription_status, subscription_end, created_at FROM users WHERE email IS NOT NULL
+        ''',
+        "DROP TABLE users",
+        "ALTER TABLE users_nueva RENAME TO users",
+        "CREATE INDEX IF NOT EXISTS idx_evaluations_email_fecha ON evaluations (user_email, created_at)",
+    ]),
+]
+
+CACHE_IA_MIGRATIONS = [
+    (1, "Tabla llm_cache", [
+        '''
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            clave TEXT PRIMARY KEY,
+            modelo TEXT,
+            respuesta TEXT,
+            creado REAL,
+            usado REAL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_llm_cache_usado ON llm_cache (usado)",
+    ]),
+]
+
+
+def schema_version(conn):
+    """Versión de esquema aplicada en la conexión (0 si no hay ninguna)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            descripcion TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(path, migrations):
+    """Aplicar en orden las migraciones pendientes y devolver la versión final"""
+    with get_pool(path).connection() as conn:
+        # Claves foráneas desactivadas mientras se migra para poder reconstruir tablas
+        # referenciadas; se verifican completas antes de confirmar (solo fuera de transacción)
+        conn.execute("PRAGMA foreign_keys = OFF")
+        try:
+            with conn:
+                # Bloqueo de escritura para que dos procesos no migren a la vez
+                conn.execute("BEGIN IMMEDIATE")
+                inicial = actual = schema_version(conn)
+                for version, descripcion, sentencias in migrations:
+                    if version <= actual:
+                        continue
+                    for sql in sentencias:
+                        conn.execute(sql)
+                    conn.execute(
+                        "INSERT INTO schema_version (version, descripcion) VALUES (?, ?)",
+                        (version, descripcion),
+                    )
+                    actual = version
+                if actual != inicial and conn.execute("PRAGMA foreign_key_check").fetchone():
+                    raise sqlite3.IntegrityError(f"La migración a la versión {actual} rompe claves foráneas")
+        finally:
+            conn.execute("PRAGMA foreign_keys = ON")
+    return actual
@@ -0,0 +1,93 @@
+# moneda.py - Formato y lectura de montos de moneda para Investly
+import re
+from functools import lru_cache
+
+# Símbolo, separador de miles y separador decimal por locale
+FORMATOS = {
+    "en_US": ("$", ",", "."),
+    "es_CO": ("$", ".", ","),
+}
+LOCALE_POR_DEFECTO = "en_US"
+
+# Todo lo que no sea dígito o separador (símbolos, espacios, apóstrofos, signos)
+_NO_NUMERICO = re.compile(r"[^\d.,]")
+# Lo único que admite la lectura estricta además de dígitos y separadores
+_AJENO = re.compile(r"[^\d.,\s$'+\-]")
+# Un "-" antes del primer dígito ("-$500", "$-500.00") hace negativo el monto
+_NEGATIVO = re.compile(r"^[^\d]*-")
+# Monto bien formado por (miles, decimal): grupos de miles válidos (el primero de 1 a 3
+# dígitos y los demás de exactamente 3) o ninguno, y como mucho un separador decimal
+_PATRONES = {
+    (",", "."): re.compile(r"(?:\d{1,3}(?:,\d{3})+|\d*)(?:\.\d*)?"),
+    (".", ","): re.compile(r"(?:\d{1,3}(?:\.\d{3})+|\d*)(?:,\d*)?"),
+}
+# Atajo para lo que escribe format_currency ("$1,234.56", "$1.234,56"): dos decimales tras
+# el último separador no dejan duda de cuál es el decimal
+_FORMATEADO = re.compile(r"\$?(\d{1,3}(?:,\d{3})*)\.(\d\d)|\$?(\d{1,3}(?:\.\d{3})*),(\d\d)")
+
+
+def _separadores(limpio):
+    """(miles, decimal) deducidos del propio texto cuando no se indica locale
+
+    El último separador es el decimal si aparecen ambos. Con un solo tipo de separador, la
+    regla es la misma para coma y punto: repetido es de miles, y también lo es si deja un
+    grupo válido antes (1 a 3 dígitos, sin empezar en cero) y exactamente tres dígitos
+    después ("1,500" y "1.500" son 1500; "0.500" es 0.5 y "1234.567" es 1234.567); en
+    cualquier otro caso es decimal. Que los grupos sean válidos lo comprueba _PATRONES.
+    """
+    coma, punto = limpio.rfind(","), limpio.rfind(".")
+    if coma >= 0 and punto >= 0:
+        return (".", ",") if coma > punto else (",", ".")
+    separador = "," if coma >= 0 else "."
+    posicion = max(coma, punto)
+    if posicion >= 0 and (
+        limpio.count(separador) > 1
+        or (len(limpio) - posicion == 4 and posicion <= 3 and limpio[0] != "0")
+    ):
+        miles = separador
+    else:
+        miles = "." if separador == "," else ","
+    return miles, "," if miles == "." else "."
+
+
+# Función para formatear números como moneda
+@lru_cache(maxsize=4096)
+def format_currency(value, locale=LOCALE_POR_DEFECTO):
+    simbolo, miles, decimal = FORMATOS[locale]
+    texto = f"{value:,.2f}" if value else "0.00"
+    if miles != ",":
+        texto = texto.translate({ord(","): miles, ord("."): decimal})
+    return simbolo + texto
+
+
+# Función para extraer el valor numérico de un string de moneda ("$1,234.56", "1.234,56", "1 234")
+# Un texto que no es un monto ("1.2.3,4,5", "1,000,5", "abc") se lee como 0.0, o como None con
+# estricto=True, que además rechaza letras junto a los dígitos ("12abc")
+@lru_cache(maxsize=4096)
+def parse_currency(currency_str, locale=None, estricto=False):
+    if not currency_str:
+        return 0.0
+    if not locale:
+        formateado = _FORMATEADO.fullmatch(currency_str)
+        if formateado:
+            if formateado[1]:
+                return float(f"{formateado[1].replace(',', '')}.{formateado[2]}")
+            return float(f"{formateado[3].replace('.', '')}.{formateado[4]}")
+    invalido = None if estricto else 0.0
+    if estricto and _AJENO.search(currency_str):
+        return invalido
+    limpio = _NO_NUMERICO.sub("", currency_str)
+    if not limpio:
+        return invalido
+    miles, decimal = FORMATOS[locale][1:] if locale else _separadores(limpio)
+    if not _PATRONES[miles, decimal].fullmatch(limpio):
+        return invalido
+    limpio = limpio.replace(miles, "")
+    if decimal != ".":
+        limpio = limpio.replace(decimal, ".")
+    try:
+        monto = float(limpio)
+    except ValueError:
+        # Separadores sin dígitos (".", ",")
+        return invalido
+    return -monto if _NEGATIVO.match(currency_str) else monto
@@ -0,0 +1,117 @@
+# pagos.py - Cliente de Stripe reutilizable: conexiones persistentes, timeouts, reintentos y pool de hilos propio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import stripe
+from requests.adapters import HTTPAdapter
+from stripe import api_requestor, http_client
+
+# (conexión, lectura) en segundos: un checkout nunca deja esperando al usuario indefinidamente
+TIMEOUT = (3.05, 15)
+# Reintentos ante errores de red, 409 y 5xx; Stripe espera 0.5 s, 1 s, ... (máx. 2 s) con jitter
+REINTENTOS = 2
+RUTA_CHECKOUT = "/v1/checkout/sessions"
+# Una sesión precargada se deja de ofrecer este margen antes de su expires_at (Stripe: 24 h)
+MARGEN_VENCIMIENTO = 600
+
+
+class ClienteStripe:
+    """Llamadas a Stripe desde un pool de hilos, sobre una sola sesión HTTP keep-alive
+
+    La API key y la URL base viajan con cada solicitud, sin tocar stripe.api_key ni
+    stripe.default_http_client. Los reintentos se fijan en stripe.max_network_retries, que
+    stripe 7 solo admite por proceso. Los POST llevan Idempotency-Key, así que un reintento
+    nunca crea dos sesiones de checkout.
+    """
+
+    def __init__(self, api_key, api_base=None, timeout=TIMEOUT, reintentos=REINTENTOS, max_workers=4):
+        self.api_key = api_key
+        self.api_base = api_base
+        sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        sesion.mount("https://", adaptador)
+        sesion.mount("http://", adaptador)
+        self._http = http_client.RequestsClient(timeout=timeout, session=sesion)
+        stripe.max_network_retries = reintentos
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="investly-stripe")
+
+    def _solicitar(self, metodo, ruta, params):
+        requestor = api_requestor.APIRequestor(key=self.api_key, client=self._http, api_base=self.api_base)
+        respuesta, _ = requestor.request(metodo, ruta, params)
+        return respuesta.data
+
+    def crear_checkout(self, email, price_id, success_url, cancel_url):
+        """Encolar la creación de una sesión de checkout de suscripción y devolver su Future
+
+        El Future resuelve al dict de la sesión (id, url, expires_at, ...) o lanza el error de Stripe.
+        """
+        params = {
+            "payment_method_types": ["card"],
+            "line_items": [{"price": price_id, "quantity": 1}],
+            "mode": "subscription",
+            "customer_email": email,
+            "success_url": success_url + "?session_id={CHECKOUT_SESSION_ID}",
+            "cancel_url": cancel_url,
+            "metadata": {"user_email": email},
+            "subscription_data": {"metadata": {"user_email": email}},
+        }
+        return self._executor.submit(self._solicitar, "post", RUTA_CHECKOUT, params)
+
+    def cerrar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class CacheCheckout:
+    """Sesión de checkout por email, creada en segundo plano y reutilizada hasta que vence
+
+    `precargar` se llama al mostrar la página de pago; cuando el usuario hace clic la URL
+    normalmente ya está lista. Crear sesiones de más no cuesta nada en Stripe: las que no
+    se usan simplemente expiran. Un Future fallido se descarta y la siguiente llamada lo
+    vuelve a intentar. Una URL entregada por `url` no se vuelve a ofrecer: el usuario pudo
+    pagarla o cancelarla, y sin webhook nada lo avisaría.
+    """
+
+    def __init__(self, cliente, price_id, success_url, cancel_url, margen=MARGEN_VENCIMIENTO, max_entradas=10000):
+        self._cliente = cliente
+        self._params = (price_id, success_url, cancel_url)
+        self.margen = margen
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _vigente(self, futuro):
+        if not futuro.done():
+            return True
+        if futuro.exception() is not None:
+            return False
+        return futuro.result()["expires_at"] - self.margen > time.time()
+
+    def precargar(self, email):
+        """Future de la sesión del usuario: la vigente o en curso, o una nueva encolada ahora"""
+        with self._lock:
+            futuro = self._entradas.get(email)
+            if futuro is not None and self._vigente(futuro):
+                self._entradas.move_to_end(email)
+                return futuro
+            futuro = self._cliente.crear_checkout(email, *self._params)
+            self._entradas[email] = futuro
+            self._entradas.move_to_end(email)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return futuro
+
+    def url(self, email, timeout=None):
+        """URL de checkout del usuario; solo espera si la precarga no ha terminado"""
+        futuro = self.precargar(email)
+        url = futuro.result(timeout)["url"]
+        with self._lock:
+            if self._entradas.get(email) is futuro:
+                del self._entradas[email]
+        return url
+
+    def invalidar(self, email):
+        with self._lock:
+            self._entradas.pop(email, None)
@@ -0,0 +1,139 @@
+# presupuesto.py - Libro de partidas de presupuesto con totales acumulados
+import math
+from collections.abc import Mapping, MutableMapping
+
+import numpy as np
+
+# Filas mínimas reservadas al crear un libro; la matriz duplica su capacidad al llenarse
+CAPACIDAD_MINIMA = 4
+
+
+class PartidaVista(MutableMapping):
+    """Vista tipo dict de una partida ({"valor": ..., "deuda": ...}) respaldada por el libro"""
+    __slots__ = ("_libro", "_nombre")
+
+    def __init__(self, libro, nombre):
+        self._libro = libro
+        self._nombre = nombre
+
+    def __getitem__(self, campo):
+        return self._libro.monto(self._nombre, campo)
+
+    def __setitem__(self, campo, monto):
+        self._libro.actualizar(self._nombre, campo, monto)
+
+    def __delitem__(self, campo):
+        raise TypeError("Los campos de una partida son fijos")
+
+    def __iter__(self):
+        return iter(self._libro.campos)
+
+    def __len__(self):
+        return len(self._libro.campos)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class LibroPresupuesto(Mapping):
+    """Partidas de una tabla de presupuesto (activos, pasivos, ingresos o gastos)
+
+    Los montos viven en una matriz float64 (una fila por partida, una columna por campo) y
+    el libro se usa como un dict de solo lectura nombre -> PartidaVista. Los totales se
+    mantienen por deltas: cambiar o agregar una partida cuesta O(1) y nunca se vuelve a
+    recorrer la tabla. Se acumulan en centavos enteros para que miles de actualizaciones
+    no arrastren error de redondeo.
+    """
+    __slots__ = ("campos", "signo", "_columnas", "_filas", "_ayudas", "_montos", "_centavos")
+
+    def __init__(self, partidas=(), campos=("valor",), signo=1):
+        self.campos = tuple(campos)
+        self.signo = signo
+        self._columnas = {campo: j for j, campo in enumerate(self.campos)}
+        self._filas = {}
+        self._ayudas = []
+        partidas = list(partidas)
+        self._montos = np.zeros((max(len(partidas), CAPACIDAD_MINIMA), len(self.campos)))
+        self._centavos = [0] * len(self.campos)
+        for nombre, ayuda in partidas:
+            self.agregar(nombre, ayuda)
+
+    def __getitem__(self, nombre):
+        if nombre not in self._filas:
+            raise KeyError(nombre)
+        return PartidaVista(self, nombre)
+
+    def __len__(self):
+        return len(self._filas)
+
+    def __iter__(self):
+        return iter(self._filas)
+
+    def __contains__(self, nombre):
+        return nombre in self._filas
+
+    def partidas(self):
+        """Pares (nombre, ayuda) en orden de creación"""
+        return zip(self._filas, self._ayudas)
+
+    def agregar(self, nombre, ayuda="", **montos):
+        """Nueva partida en cero, con montos iniciales opcionales por campo"""
+        if nombre in self._filas:
+            raise ValueError(f"La partida '{nombre}' ya existe")
+        fila = len(self._filas)
+        if fila == len(self._montos):
+            self._montos = np.concatenate([self._montos, np.zeros_like(self._montos)])
+        self._filas[nombre] = fila
+        self._ayudas.append(ayuda)
+        for campo, monto in montos.items():
+            self.actualizar(nombre, campo, monto)
+
+    def eliminar(self, nombre):
+        """Quitar una partida (O(n): compacta las filas para conservar el orden)"""
+        fila = self._filas.pop(nombre)
+        for j, monto in enumerate(self._montos[fila].tolist()):
+            self._centavos[j] -= round(monto * 100)
+        n = len(self._filas)
+        self._montos[fila:n] = self._montos[fila + 1:n + 1]
+        self._montos[n] = 0.0
+        del self._ayudas[fila]
+        for otro, i in self._filas.items():
+            if i > fila:
+                self._filas[otro] = i - 1
+
+    def actualizar(self, nombre, campo, monto):
+        """Fijar el monto de una partida y aplicar la diferencia a los totales; devuelve si cambió"""
+        if not math.isfinite(monto):
+            # inf o nan no caben en centavos enteros (round lanza OverflowError o ValueError)
+            raise ValueError(f"Monto no válido para '{nombre}': {monto}")
+        i, j = self._filas[nombre], self._columnas[campo]
+        anterior = float(self._montos[i, j])
+        if monto == anterior:
+            return False
+        self._montos[i, j] = monto
+        self._centavos[j] += round(monto * 100) - round(anterior * 100)
+        return True
+
+    def monto(self, nombre, campo="valor"):
+        return float(self._montos[self._filas[nombre], self._columnas[campo]])
+
+    def columna(self, campo="valor"):
+        """Montos de un campo para todas las partidas (vista de solo lectura de la matriz)"""
+        vista = self._montos[:len(self._filas), self._columnas[campo]]
+        vista.flags.writeable = False
+        return vista
+
+    def neto(self, nombre):
+        """Valor menos deuda de una partida, con el signo de la tabla"""
+        valor = self.monto(nombre, "valor")
+        deuda = self.monto(nombre, "deuda") if "deuda" in self._columnas else 0.0
+        return self.signo * (valor - deuda)
+
+    def total(self, campo="valor"):
+        return self._centavos[self._columnas[campo]] / 100
+
+    def totales(self):
+        """Totales por campo más el neto de la tabla (con su signo)"""
+        totales = {campo: self.total(campo) for campo in self.campos}
+        totales["neto"] = self.signo * (totales["valor"] - totales.get("deuda", 0.0))
+        return totales
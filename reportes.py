@@ -0,0 +1,284 @@
+# reportes.py - Generación de reportes PDF de Investly y caché por hash de contenido
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from fpdf import FPDF, XPos, YPos
+
+from moneda import format_currency
+
+# Cambiar al modificar el diseño del PDF para invalidar los reportes cacheados
+VERSION_PLANTILLA = 2
+
+
+# Estilos de texto del reporte: (familia, estilo, tamaño). Helvetica es la fuente
+# core que FPDF usa en lugar de Arial, así no hay sustitución en cada cambio de fuente.
+ESTILOS = {
+    "titulo": ("helvetica", "B", 16),
+    "subtitulo": ("helvetica", "B", 14),
+    "seccion": ("helvetica", "B", 12),
+    "texto": ("helvetica", "", 12),
+}
+
+# Plantilla declarativa del reporte. Elementos:
+#   ("celda", estilo, texto, alineación)   una línea; texto fijo o función (usuario, finanzas, analisis)
+#   ("parrafo", estilo, texto)             texto multilínea
+#   ("espacio", alto)                      salto vertical
+#   ("si", clave, elementos)               sección incluida solo si `clave` está en analisis
+PLANTILLA_REPORTE = (
+    ("celda", "titulo", "Investly - Informe de Análisis Financiero", "C"),
+    ("celda", "subtitulo", "Evaluación de Inversión en Bienes Raíces", "C"),
+    ("espacio", 10),
+
+    ("celda", "seccion", "Datos Personales:", ""),
+    ("celda", "texto", lambda u, f, a: f"Nombre: {u.get('nombre', '')}", ""),
+    ("celda", "texto", lambda u, f, a: f"Edad: {u.get('edad', '')}", ""),
+    ("celda", "texto", lambda u, f, a: f"Email: {u.get('email', '')}", ""),
+    ("espacio", 5),
+
+    ("celda", "seccion", "Situación Financiera:", ""),
+    ("celda", "texto", lambda u, f, a: f"Ingresos Mensuales: {format_currency(f.get('ingresos', 0))}", ""),
+    ("celda", "texto", lambda u, f, a: f"Gastos Mensuales: {format_currency(f.get('gastos', 0))}", ""),
+    ("celda", "texto", lambda u, f, a: f"Activos Totales: {format_currency(f.get('activos', 0))}", ""),
+    ("celda", "texto", lambda u, f, a: f"Pasivos Totales: {format_currency(f.get('pasivos', 0))}", ""),
+    ("espacio", 5),
+
+    ("si", "perfil_inversion", (
+        ("celda", "seccion", lambda u, f, a: f"Perfil de Inversión en Bienes Raíces: {a['perfil_inversion']['nivel']}", ""),
+        ("parrafo", "texto", lambda u, f, a: a['perfil_inversion']['descripcion']),
+        ("espacio", 5),
+    )),
+
+    ("celda", "seccion", "Análisis y Recomendaciones:", ""),
+    ("parrafo", "texto", lambda u, f, a: a.get('resumen', '')),
+    ("espacio", 5),
+
+    ("si", "plan_trabajo", (
+        ("celda", "seccion", "Plan de Trabajo Personalizado:", ""),
+        ("parrafo", "texto", lambda u, f, a: a['plan_trabajo']),
+    )),
+
+    ("si", "recomendaciones_cursos", (
+        ("celda", "seccion", "Recomendaciones de Educación Financiera:", ""),
+        ("parrafo", "texto", lambda u, f, a: a['recomendaciones_cursos']),
+    )),
+)
+
+
+def _texto(texto, datos):
+    return texto(*datos) if callable(texto) else texto
+
+
+def _op_fuente(pdf, datos, familia, estilo, tamaño):
+    pdf.set_font(familia, estilo, tamaño)
+
+
+def _op_celda(pdf, datos, texto, align):
+    pdf.cell(200, 10, _texto(texto, datos), new_x=XPos.LMARGIN, new_y=YPos.NEXT, align=align)
+
+
+def _op_parrafo(pdf, datos, texto):
+    # Línea por línea: la memoria del maquetado depende de la línea más larga y no del
+    # texto completo (un plan de IA largo). La última línea deja el cursor como multi_cell.
+    *lineas, ultima = _texto(texto, datos).split("\n")
+    for linea in lineas:
+        pdf.multi_cell(0, 10, linea, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    if ultima or not lineas:
+        pdf.multi_cell(0, 10, ultima)
+    else:
+        # Texto terminado en salto de línea: multi_cell deja el cursor en el margen izquierdo
+        pdf.multi_cell(0, 10, ultima, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+
+def _op_espacio(pdf, datos, alto):
+    pdf.ln(alto)
+
+
+def _op_si(pdf, datos, clave, operaciones):
+    if clave in datos[2]:
+        for op, args in operaciones:
+            op(pdf, datos, *args)
+
+
+def compilar_plantilla(plantilla, estilo_actual=None):
+    """Convertir la plantilla en una lista plana de operaciones (función, args)
+
+    Los cambios de fuente se resuelven aquí: solo se emite set_font cuando el estilo
+    cambia respecto al elemento anterior. Devuelve (operaciones, estilo al terminar).
+    """
+    operaciones = []
+    for elemento in plantilla:
+        tipo = elemento[0]
+        if tipo == "espacio":
+            operaciones.append((_op_espacio, elemento[1:]))
+        elif tipo == "si":
+            _, clave, hijos = elemento
+            ops_hijos, _ = compilar_plantilla(hijos, estilo_actual)
+            operaciones.append((_op_si, (clave, ops_hijos)))
+            # Tras una sección opcional el estilo vigente depende de los datos
+            estilo_actual = None
+        else:
+            estilo = elemento[1]
+            if estilo != estilo_actual:
+                operaciones.append((_op_fuente, ESTILOS[estilo]))
+                estilo_actual = estilo
+            if tipo == "celda":
+                operaciones.append((_op_celda, elemento[2:]))
+            else:
+                operaciones.append((_op_parrafo, elemento[2:]))
+    return operaciones, estilo_actual
+
+
+# Compilada una sola vez por proceso; cada render solo recorre las operaciones
+OPERACIONES_REPORTE, _ = compilar_plantilla(PLANTILLA_REPORTE)
+
+
+# Tamaño de bloque al volcar el PDF a un archivo o respuesta
+TAM_BLOQUE = 64 * 1024
+
+
+def renderizar_pdf(usuario_data, finanzas_data, analisis_data):
+    """Buffer del PDF tal como lo produce FPDF (bytearray), sin copias intermedias"""
+    pdf = FPDF()
+    pdf.add_page()
+    
+    datos = (usuario_data, finanzas_data, analisis_data)
+    for op, args in OPERACIONES_REPORTE:
+        op(pdf, datos, *args)
+    
+    return pdf.output()
+
+
+# Función para generar PDF
+def generate_pdf(usuario_data, finanzas_data, analisis_data):
+    return bytes(renderizar_pdf(usuario_data, finanzas_data, analisis_data))
+
+
+def iterar_pdf(usuario_data, finanzas_data, analisis_data, tam_bloque=TAM_BLOQUE):
+    """Bloques del PDF (memoryview sobre el único buffer) para respuestas por partes"""
+    buffer = memoryview(renderizar_pdf(usuario_data, finanzas_data, analisis_data))
+    for inicio in range(0, len(buffer), tam_bloque):
+        yield buffer[inicio:inicio + tam_bloque]
+
+
+def escribir_pdf(usuario_data, finanzas_data, analisis_data, destino, tam_bloque=TAM_BLOQUE):
+    """Volcar el PDF a una ruta o a un archivo binario abierto; devuelve los bytes escritos"""
+    if isinstance(destino, (str, os.PathLike)):
+        with open(destino, "wb") as f:
+            return escribir_pdf(usuario_data, finanzas_data, analisis_data, f, tam_bloque)
+    total = 0
+    for bloque in iterar_pdf(usuario_data, finanzas_data, analisis_data, tam_bloque):
+        total += destino.write(bloque)
+    return total
+
+
+def clave_reporte(usuario_data, finanzas_data, analisis_data):
+    """Hash SHA-256 del contenido del reporte y de la versión de la plantilla"""
+    contenido = json.dumps(
+        [VERSION_PLANTILLA, usuario_data, finanzas_data, analisis_data],
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+class CacheReportes:
+    """PDFs por hash de contenido: LRU en memoria acotado por bytes y copia opcional en disco"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, directorio=None):
+        self.max_bytes = max_bytes
+        self.directorio = directorio
+        self._memoria = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    def _guardar_memoria(self, clave, pdf_bytes):
+        with self._lock:
+            if clave in self._memoria:
+                return
+            self._memoria[clave] = pdf_bytes
+            self._bytes += len(pdf_bytes)
+            while self._bytes > self.max_bytes and len(self._memoria) > 1:
+                _, viejo = self._memoria.popitem(last=False)
+                self._bytes -= len(viejo)
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.pdf")
+
+    def obtener(self, usuario_data, finanzas_data, analisis_data):
+        """Bytes del PDF; solo se genera si el contenido no está en memoria ni en disco"""
+        clave = clave_reporte(usuario_data, finanzas_data, analisis_data)
+        with self._lock:
+            pdf_bytes = self._memoria.get(clave)
+            if pdf_bytes is not None:
+                self._memoria.move_to_end(clave)
+                return pdf_bytes
+
+        if self.directorio and os.path.exists(self._ruta(clave)):
+            with open(self._ruta(clave), "rb") as f:
+                pdf_bytes = f.read()
+        else:
+            pdf_bytes = generate_pdf(usuario_data, finanzas_data, analisis_data)
+            if self.directorio:
+                # Escritura atómica para que otro proceso nunca lea un PDF a medias
+                fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(pdf_bytes)
+                os.replace(tmp, self._ruta(clave))
+
+        self._guardar_memoria(clave, pdf_bytes)
+        return pdf_bytes
+
+
+def renderizar_lote(lote, directorio=None):
+    """Generar en un proceso hijo los PDFs de un lote de (nombre, usuario, finanzas, analisis)
+
+    Con `directorio`, cada PDF se escribe ahí desde el propio proceso hijo y solo vuelven
+    los nombres; sin él, los bytes vuelven al proceso principal.
+    """
+    if directorio:
+        for nombre, usuario, finanzas, analisis in lote:
+            escribir_pdf(usuario, finanzas, analisis, os.path.join(directorio, nombre))
+        return [(nombre, None) for nombre, _, _, _ in lote]
+    return [(nombre, generate_pdf(usuario, finanzas, analisis)) for nombre, usuario, finanzas, analisis in lote]
+
+
+def renderizar_en_paralelo(trabajos, escribir=None, workers=None, tam_lote=16, directorio=None):
+    """Renderizar trabajos (nombre, usuario, finanzas, analisis) en un pool de procesos
+
+    Con `directorio`, los procesos hijos escriben los PDF directamente en disco. Si no,
+    `escribir(nombre, pdf_bytes)` recibe cada PDF en el proceso principal. Como máximo hay
+    dos lotes por worker en vuelo, así la memoria no depende del total de reportes.
+    Devuelve la cantidad de reportes generados.
+    """
+    workers = workers or os.cpu_count() or 1
+    trabajos = iter(trabajos)
+    total = 0
+
+    def recoger(hechos):
+        n = 0
+        for futuro in hechos:
+            for nombre, pdf_bytes in futuro.result():
+                if escribir is not None:
+                    escribir(nombre, pdf_bytes)
+                n += 1
+        return n
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pendientes = set()
+        while True:
+            lote = list(islice(trabajos, tam_lote))
+            if not lote:
+                break
+            if len(pendientes) >= 2 * workers:
+                hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                total += recoger(hechos)
+            pendientes.add(executor.submit(renderizar_lote, lote, directorio))
+        total += recoger(wait(pendientes)[0])
+    return total
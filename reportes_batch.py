@@ -0,0 +1,83 @@
+# reportes_batch.py - Exportación masiva de reportes PDF en paralelo
+#
+# Uso:
+#   python reportes_batch.py --salida reportes/               # un PDF por registro de finanzas
+#   python reportes_batch.py --salida reportes.zip --workers 8
+import argparse
+import os
+import sys
+import time
+import zipfile
+
+from analisis import analizar_finanzas, resumen_analisis
+from db import get_pool
+from ingesta import leer_monto
+from reportes import renderizar_en_paralelo
+
+
+def leer_trabajos(path, lote=1000):
+    """(nombre, usuario, finanzas, analisis) por cada usuario de `usuarios` unido con `finanzas`"""
+    with get_pool(path).connection() as conn:
+        cursor = conn.execute('''
+            SELECT u.id, u.nombre, u.edad, u.email, u.telefono, f.id,
+                   f.ingresos_mensuales, f.gastos_mensuales, f.activos_totales, f.pasivos_totales
+            FROM usuarios u
+            JOIN finanzas f ON f.usuario_id = u.id
+            ORDER BY f.id
+        ''')
+        while True:
+            filas = cursor.fetchmany(lote)
+            if not filas:
+                break
+            for usuario_id, nombre, edad, email, telefono, finanzas_id, *montos in filas:
+                montos = [leer_monto(v) for v in montos]
+                if None in montos:
+                    print(f"finanzas {finanzas_id} omitida: monto inválido", file=sys.stderr)
+                    continue
+                ingresos, gastos, activos, pasivos = montos
+                resultado = analizar_finanzas(ingresos, gastos, activos, pasivos)
+                yield (
+                    f"reporte_{usuario_id}_{finanzas_id}.pdf",
+                    {"nombre": nombre, "edad": edad, "email": email, "telefono": telefono},
+                    {"ingresos": ingresos, "gastos": gastos, "activos": activos, "pasivos": pasivos},
+                    {
+                        "perfil_inversion": {"nivel": resultado.perfil, "descripcion": resultado.descripcion},
+                        "resumen": resumen_analisis(resultado),
+                    },
+                )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generar los reportes PDF de todos los usuarios en paralelo")
+    parser.add_argument("--db", default="usuarios.db", help="base de datos SQLite (por defecto usuarios.db)")
+    parser.add_argument("--salida", required=True, help="directorio o archivo .zip de destino")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="procesos en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument("--lote", type=int, default=16, help="reportes por tarea enviada a cada proceso")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        parser.error(f"no existe la base de datos {args.db}")
+
+    inicio = time.perf_counter()
+    if args.salida.endswith(".zip"):
+        # Los PDF ya vienen comprimidos: se guardan sin volver a comprimir
+        with zipfile.ZipFile(args.salida, "w", compression=zipfile.ZIP_STORED) as archivo:
+            def escribir(nombre, pdf_bytes):
+                with archivo.open(nombre, "w") as destino:
+                    destino.write(pdf_bytes)
+
+            total = renderizar_en_paralelo(leer_trabajos(args.db), escribir, workers=args.workers, tam_lote=args.lote)
+    else:
+        # Cada proceso escribe sus PDF directamente en el directorio de salida
+        os.makedirs(args.salida, exist_ok=True)
+        total = renderizar_en_paralelo(
+            leer_trabajos(args.db), workers=args.workers, tam_lote=args.lote, directorio=args.salida
+        )
+
+    duracion = time.perf_counter() - inicio
+    print(f"{total} reportes con {args.workers} procesos en {duracion:.2f} s ({total / duracion if duracion else 0:,.1f} reportes/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
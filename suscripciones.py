@@ -0,0 +1,224 @@
+# suscripciones.py - Estado Pro por usuario: caché en proceso con TTL y webhook de Stripe que lo invalida
+#
+# Las apps NewAPP*.py arrancan el receptor dentro de su proceso si existe STRIPE_WEBHOOK_SECRET,
+# así el caché se invalida al instante. Como servidor independiente (la app ve el cambio al
+# vencer el TTL de su caché):
+#   STRIPE_WEBHOOK_SECRET=whsec_... python suscripciones.py --db investly.db --port 8790
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import stripe
+
+from db import get_pool
+from migrations import migrate, INVESTLY_MIGRATIONS
+
+RUTA_WEBHOOK = "/webhook/stripe"
+
+# Vigencia provisional tras el checkout, hasta que llegue la factura con el periodo real
+DIAS_PERIODO = 31
+
+ESTADOS_ACTIVOS = ("active", "trialing")
+
+
+def _fecha(valor):
+    """date de un 'YYYY-MM-DD' guardado en users o de un timestamp Unix de Stripe"""
+    if not valor:
+        return None
+    if isinstance(valor, (int, float)):
+        return datetime.fromtimestamp(valor, timezone.utc).date()
+    return datetime.strptime(valor, "%Y-%m-%d").date()
+
+
+class CacheSuscripciones:
+    """Estado de suscripción por email, leído de users como mucho una vez por TTL
+
+    La fecha de fin se convierte una sola vez al cargar; cada consulta solo la compara con
+    hoy. Las entradas se invalidan al procesar un webhook del usuario.
+    """
+
+    def __init__(self, path, ttl=300, max_entradas=100000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._pool = get_pool(path)
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self._invalidaciones = 0
+        self.hits = 0
+        self.misses = 0
+        migrate(path, INVESTLY_MIGRATIONS)
+
+    def _cargar(self, email):
+        with self._pool.connection() as conn:
+            fila = conn.execute(
+                "SELECT subscription_status, subscription_end FROM users WHERE email = ?", (email,)
+            ).fetchone()
+        if not fila:
+            return False, None
+        return bool(fila[0]), _fecha(fila[1])
+
+    def esta_activa(self, email):
+        """True si el usuario tiene una suscripción activa que no ha vencido"""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(email)
+            if entrada is not None and entrada[2] > ahora:
+                self._entradas.move_to_end(email)
+                self.hits += 1
+                activa, fin, _ = entrada
+                return activa and fin is not None and fin > date.today()
+            self.misses += 1
+            invalidaciones = self._invalidaciones
+        activa, fin = self._cargar(email)
+        with self._lock:
+            # Si llegó un webhook durante la lectura, lo leído puede ser anterior: no se cachea
+            if invalidaciones == self._invalidaciones:
+                self._entradas[email] = (activa, fin, ahora + self.ttl)
+                self._entradas.move_to_end(email)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+        return activa and fin is not None and fin > date.today()
+
+    def invalidar(self, email):
+        with self._lock:
+            self._invalidaciones += 1
+            self._entradas.pop(email, None)
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entradas": len(self._entradas),
+            }
+
+
+def guardar_suscripcion(path, email, activa, fin=None):
+    """Actualizar en su lugar el estado del usuario (creándolo si no existe); fin=None conserva la fecha"""
+    with get_pool(path).transaction() as conn:
+        conn.execute(
+            "INSERT INTO users (email, subscription_status, subscription_end) VALUES (?, ?, ?) "
+            "ON CONFLICT (email) DO UPDATE SET subscription_status = excluded.subscription_status, "
+            "subscription_end = COALESCE(excluded.subscription_end, users.subscription_end)",
+            (email, activa, fin.isoformat() if fin else None),
+        )
+
+
+def interpretar_evento(evento):
+    """(email, activa, fin) de un evento de Stripe que cambia la suscripción, o None si no aplica"""
+    tipo = evento["type"]
+    objeto = evento["data"]["object"]
+    metadata = objeto.get("metadata") or {}
+    if tipo == "checkout.session.completed":
+        if objeto.get("mode") != "subscription" or objeto.get("payment_status") == "unpaid":
+            return None
+        email = metadata.get("user_email") or objeto.get("customer_email")
+        return email, True, date.today() + timedelta(days=DIAS_PERIODO)
+    if tipo in ("customer.subscription.created", "customer.subscription.updated"):
+        return metadata.get("user_email"), objeto.get("status") in ESTADOS_ACTIVOS, _fecha(objeto.get("current_period_end"))
+    if tipo == "customer.subscription.deleted":
+        return metadata.get("user_email"), False, None
+    if tipo == "invoice.paid":
+        lineas = (objeto.get("lines") or {}).get("data") or []
+        fin = _fecha(lineas[-1]["period"]["end"]) if lineas else None
+        return objeto.get("customer_email"), True, fin
+    return None
+
+
+def procesar_evento(evento, path, cache=None, checkouts=None):
+    """Aplicar un evento de Stripe a users e invalidar el caché; devuelve el email afectado o None
+
+    `checkouts` (un pagos.CacheCheckout) pierde la sesión del usuario: tras pagar o cancelar,
+    la sesión precargada ya no sirve.
+    """
+    cambio = interpretar_evento(evento)
+    if not cambio or not cambio[0]:
+        return None
+    email, activa, fin = cambio
+    guardar_suscripcion(path, email, activa, fin)
+    if cache is not None:
+        cache.invalidar(email)
+    if checkouts is not None:
+        checkouts.invalidar(email)
+    return email
+
+
+class ManejadorWebhook(BaseHTTPRequestHandler):
+    """POST /webhook/stripe con firma verificada; la configuración vive en el servidor"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _responder(self, codigo, cuerpo):
+        datos = json.dumps(cuerpo).encode()
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_POST(self):
+        if self.path != RUTA_WEBHOOK:
+            self._responder(404, {"error": "ruta desconocida"})
+            return
+        payload = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+        try:
+            evento = stripe.Webhook.construct_event(payload, self.headers.get("Stripe-Signature", ""), self.server.secreto)
+        except (ValueError, stripe.error.SignatureVerificationError):
+            self._responder(400, {"error": "evento o firma inválidos"})
+            return
+        email = procesar_evento(evento, self.server.path_db, self.server.cache, self.server.checkouts)
+        self._responder(200, {"recibido": True, "actualizado": email is not None})
+
+
+def crear_servidor(path, secreto, cache=None, port=8790, host="127.0.0.1", checkouts=None):
+    servidor = ThreadingHTTPServer((host, port), ManejadorWebhook)
+    servidor.path_db = path
+    servidor.secreto = secreto
+    servidor.cache = cache
+    servidor.checkouts = checkouts
+    return servidor
+
+
+def iniciar_webhook(path, secreto, cache=None, port=8790, host="127.0.0.1", checkouts=None):
+    """Arrancar el receptor de webhooks en un hilo y devolver el servidor, o None si no se pudo
+
+    Un puerto ocupado (otra réplica u otra app ya recibe los webhooks) no es un error de la
+    app: se informa por stderr y el estado Pro se sigue leyendo de users al vencer el TTL.
+    """
+    try:
+        servidor = crear_servidor(path, secreto, cache, port, host, checkouts)
+    except OSError as e:
+        print(f"Receptor de webhooks de Stripe no iniciado en {host}:{port}: {e}", file=sys.stderr)
+        return None
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Receptor de webhooks de Stripe para Investly")
+    parser.add_argument("--db", default="investly.db", help="base de datos SQLite (por defecto investly.db)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    args = parser.parse_args()
+    secreto = os.getenv("STRIPE_WEBHOOK_SECRET")
+    if not secreto:
+        parser.error("define STRIPE_WEBHOOK_SECRET con el secreto de firma del endpoint")
+    migrate(args.db, INVESTLY_MIGRATIONS)
+    servidor = crear_servidor(args.db, secreto, port=args.port, host=args.host)
+    print(f"Webhooks de Stripe en http://{args.host}:{args.port}{RUTA_WEBHOOK}")
+    servidor.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+# conftest.py - Los módulos de Investly viven en la raíz del repositorio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
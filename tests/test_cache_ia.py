@@ -0,0 +1,14 @@
+# test_cache_ia.py - Agrupación de montos para el prompt del plan
+import pytest
+
+from cache_ia import agrupar_monto
+
+
+@pytest.mark.parametrize("valor, esperado", [(1050, 1050.0), (1150, 1150.0), (5024, 5020.0), (123456, 123000.0), (-37.4, -37.4), (0, 0.0)])
+def test_agrupar_monto(valor, esperado):
+    assert agrupar_monto(valor) == esperado
+
+
+@pytest.mark.parametrize("valor", [101, 1049, 99949, 123456789])
+def test_agrupar_monto_error_relativo(valor):
+    assert abs(agrupar_monto(valor) - valor) <= 0.005 * valor
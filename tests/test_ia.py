@@ -0,0 +1,55 @@
+# test_ia.py - SingleFlight comparte lanzamientos sin bloquear otras claves
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from ia import SingleFlight, TrabajoPlan
+
+
+def _trabajo():
+    trabajo = TrabajoPlan()
+    trabajo.futuro = Future()
+    return trabajo
+
+
+def test_lanzamiento_lento_no_bloquea_otras_claves():
+    vuelos = SingleFlight()
+    liberar = threading.Event()
+    lanzados = []
+
+    def lento():
+        lanzados.append(1)
+        liberar.wait(5)
+        return _trabajo()
+
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(vuelos.hacer("a", lento))) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    # Con "a" todavía lanzándose, otra clave se resuelve sin esperar
+    otro = vuelos.hacer("b", _trabajo)
+    assert otro is not None and not liberar.is_set()
+    liberar.set()
+    for hilo in hilos:
+        hilo.join()
+    assert len(lanzados) == 1
+    assert len({id(trabajo) for trabajo in resultados}) == 1
+
+
+def test_trabajo_terminado_libera_la_clave():
+    vuelos = SingleFlight()
+    trabajo = vuelos.hacer("a", _trabajo)
+    trabajo.futuro.set_result("plan")
+    assert vuelos.hacer("a", _trabajo) is not trabajo
+
+
+def test_error_al_lanzar_no_deja_la_clave_ocupada():
+    vuelos = SingleFlight()
+
+    def falla():
+        raise RuntimeError("pool lleno")
+
+    with pytest.raises(RuntimeError):
+        vuelos.hacer("a", falla)
+    assert vuelos.hacer("a", _trabajo) is not None
@@ -0,0 +1,24 @@
+# test_indices.py - Las consultas calientes usan su índice en bases recién migradas
+from indices import CONSULTAS_INVESTLY, CONSULTAS_USUARIOS, verificar_planes
+from migrations import migrate, INVESTLY_MIGRATIONS, USUARIOS_MIGRATIONS
+
+
+def test_planes_investly(tmp_path):
+    path = str(tmp_path / "investly.db")
+    migrate(path, INVESTLY_MIGRATIONS)
+    assert verificar_planes(path, CONSULTAS_INVESTLY) == []
+
+
+def test_planes_usuarios(tmp_path):
+    path = str(tmp_path / "usuarios.db")
+    migrate(path, USUARIOS_MIGRATIONS)
+    assert verificar_planes(path, CONSULTAS_USUARIOS) == []
+
+
+def test_detecta_consulta_sin_indice(tmp_path):
+    path = str(tmp_path / "investly.db")
+    migrate(path, INVESTLY_MIGRATIONS)
+    consultas = (("por fecha", "SELECT id FROM evaluations WHERE created_at = ?", "SEARCH evaluations USING INDEX"),)
+    [(nombre, plan)] = verificar_planes(path, consultas)
+    assert nombre == "por fecha"
+    assert any(paso.startswith("SCAN") for paso in plan)
@@ -0,0 +1,22 @@
+# test_ingesta.py - Lectura de montos de las cargas por lotes
+import pytest
+
+from ingesta import leer_monto
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    (None, 0.0),
+    ("", 0.0),
+    (1500, 1500.0),
+    ("1500", 1500.0),
+    ("$1,234.56", 1234.56),
+    ("1.234,56", 1234.56),
+    ("-$500.00", -500.0),
+])
+def test_leer_monto(valor, esperado):
+    assert leer_monto(valor) == esperado
+
+
+@pytest.mark.parametrize("valor", ["1.2.3,4,5", "1,2,3.4.5", "1,000,5", "12abc", "abc", "$", "inf", "nan", "9" * 400])
+def test_leer_monto_rechaza_lo_que_no_es_un_monto(valor):
+    assert leer_monto(valor) is None
@@ -0,0 +1,76 @@
+# test_migrations.py - Comportamiento de migrate() y de las migraciones de schema_version
+import sqlite3
+
+import pytest
+
+from db import get_pool
+from migrations import migrate, schema_version, INVESTLY_MIGRATIONS, USUARIOS_MIGRATIONS
+
+
+def _versiones(path):
+    with get_pool(path).connection() as conn:
+        return [fila[0] for fila in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+
+
+@pytest.mark.parametrize("migraciones", [INVESTLY_MIGRATIONS, USUARIOS_MIGRATIONS])
+def test_base_nueva_queda_en_la_ultima_version(tmp_path, migraciones):
+    path = str(tmp_path / "app.db")
+    assert migrate(path, migraciones) == migraciones[-1][0]
+    assert _versiones(path) == [version for version, _, _ in migraciones]
+
+
+def test_migrar_dos_veces_no_repite(tmp_path):
+    path = str(tmp_path / "investly.db")
+    version = migrate(path, INVESTLY_MIGRATIONS)
+    assert migrate(path, INVESTLY_MIGRATIONS) == version
+    assert _versiones(path) == [1, 2]
+
+
+def test_v2_reconstruye_users_sin_perder_datos(tmp_path):
+    path = str(tmp_path / "investly.db")
+    assert migrate(path, INVESTLY_MIGRATIONS[:1]) == 1
+    with get_pool(path).transaction() as conn:
+        conn.execute("INSERT INTO users (email, subscription_status, subscription_end) VALUES ('a@x.com', 1, '2099-01-01')")
+        conn.execute("INSERT INTO users (email) VALUES (NULL)")
+        conn.execute("INSERT INTO evaluations (user_email, evaluation_data) VALUES ('a@x.com', '[1]')")
+
+    assert migrate(path, INVESTLY_MIGRATIONS) == 2
+    with get_pool(path).connection() as conn:
+        assert conn.execute("SELECT email, subscription_status, subscription_end FROM users").fetchall() == [
+            ("a@x.com", 1, "2099-01-01")
+        ]
+        assert conn.execute("SELECT user_email FROM evaluations").fetchall() == [("a@x.com",)]
+        sql_users = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'users'").fetchone()[0]
+        assert "WITHOUT ROWID" in sql_users
+        indices = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert "idx_evaluations_email_fecha" in indices
+        # Las claves foráneas vuelven a quedar activas tras migrar
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+
+def test_migracion_fallida_no_deja_cambios(tmp_path):
+    path = str(tmp_path / "app.db")
+    migraciones = USUARIOS_MIGRATIONS[:1] + [
+        (2, "Tabla nueva y sentencia inválida", [
+            "CREATE TABLE nueva (id INTEGER PRIMARY KEY)",
+            "ALTER TABLE inexistente ADD COLUMN x",
+        ]),
+    ]
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(path, migraciones)
+    with get_pool(path).connection() as conn:
+        assert schema_version(conn) == 0
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name IN ('usuarios', 'nueva')").fetchall() == []
+
+
+def test_migracion_que_rompe_claves_foraneas_se_revierte(tmp_path):
+    path = str(tmp_path / "investly.db")
+    migrate(path, INVESTLY_MIGRATIONS)
+    migraciones = INVESTLY_MIGRATIONS + [
+        (3, "Evaluación huérfana", ["INSERT INTO evaluations (user_email, evaluation_data) VALUES ('nadie@x.com', '[1]')"]),
+    ]
+    with pytest.raises(sqlite3.IntegrityError):
+        migrate(path, migraciones)
+    assert _versiones(path) == [1, 2]
+    with get_pool(path).connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0] == 0
@@ -0,0 +1,70 @@
+# test_moneda.py - Lectura y formato de montos en en_US y es_CO
+import pytest
+
+from moneda import format_currency, parse_currency
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("$1,234.56", 1234.56),
+    ("$1.234,56", 1234.56),
+    ("1,500", 1500.0),
+    ("1.500", 1500.0),
+    ("1.234.567", 1234567.0),
+    ("1,234,567", 1234567.0),
+    ("0.500", 0.5),
+    ("1.5", 1.5),
+    ("1,5", 1.5),
+    ("12.50", 12.5),
+    ("1 234", 1234.0),
+    ("", 0.0),
+    ("abc", 0.0),
+    (".", 0.0),
+    ("1234.567", 1234.567),
+    ("12.345", 12345.0),
+    ("01,500", 1.5),
+    ("1,000,5", 0.0),
+    ("1.2.3,4,5", 0.0),
+    ("1,2,3.4.5", 0.0),
+])
+def test_parse_currency(texto, esperado):
+    assert parse_currency(texto) == esperado
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("-500", -500.0),
+    ("-$500.00", -500.0),
+    ("$-1.234,56", -1234.56),
+    ("500-", 500.0),
+])
+def test_parse_currency_conserva_el_signo(texto, esperado):
+    assert parse_currency(texto) == esperado
+
+
+@pytest.mark.parametrize("valor", [0, 0.5, 12.5, 1500, 1234567.89, -500, -0.25])
+@pytest.mark.parametrize("locale", ["en_US", "es_CO"])
+def test_ida_y_vuelta(valor, locale):
+    texto = format_currency(valor, locale)
+    assert parse_currency(texto) == valor
+    assert parse_currency(texto, locale) == valor
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("$1,234.56", 1234.56),
+    ("1.234,56", 1234.56),
+    ("1 234", 1234.0),
+    ("-$500.00", -500.0),
+    ("", 0.0),
+    ("1,000,5", None),
+    ("1.2.3,4,5", None),
+    ("1,2,3.4.5", None),
+    ("12abc", None),
+    ("abc", None),
+    (".", None),
+])
+def test_parse_currency_estricto(texto, esperado):
+    assert parse_currency(texto, estricto=True) == esperado
+
+
+@pytest.mark.parametrize("texto, locale", [("$1,234.56", "es_CO"), ("1.234,56", "en_US"), ("1,23,456", "en_US")])
+def test_parse_currency_locale_rechaza_otros_grupos(texto, locale):
+    assert parse_currency(texto, locale, estricto=True) is None
@@ -0,0 +1,48 @@
+# test_pagos.py - Sesiones de checkout precargadas por CacheCheckout
+import time
+from concurrent.futures import Future
+
+from migrations import migrate, INVESTLY_MIGRATIONS
+from pagos import CacheCheckout
+from suscripciones import procesar_evento
+
+
+class ClienteFalso:
+    """crear_checkout inmediato que numera las sesiones creadas"""
+
+    def __init__(self):
+        self.creadas = 0
+
+    def crear_checkout(self, email, price_id, success_url, cancel_url):
+        self.creadas += 1
+        futuro = Future()
+        futuro.set_result({"url": f"https://checkout/{email}/{self.creadas}", "expires_at": time.time() + 86400})
+        return futuro
+
+
+def nuevo_cache():
+    cliente = ClienteFalso()
+    return cliente, CacheCheckout(cliente, "price_prueba", "https://investly.app/success", "https://investly.app/")
+
+
+def test_precarga_se_reutiliza_hasta_entregar_la_url():
+    cliente, cache = nuevo_cache()
+    cache.precargar("a@b.c")
+    cache.precargar("a@b.c")
+    assert cache.url("a@b.c") == "https://checkout/a@b.c/1"
+    assert cliente.creadas == 1
+    # La URL entregada pudo pagarse o cancelarse: la siguiente visita recibe una sesión nueva
+    assert cache.url("a@b.c") == "https://checkout/a@b.c/2"
+
+
+def test_checkout_completado_descarta_la_precarga(tmp_path):
+    path = str(tmp_path / "investly.db")
+    migrate(path, INVESTLY_MIGRATIONS)
+    cliente, cache = nuevo_cache()
+    cache.precargar("a@b.c")
+    evento = {
+        "type": "checkout.session.completed",
+        "data": {"object": {"mode": "subscription", "payment_status": "paid", "customer_email": "a@b.c"}},
+    }
+    assert procesar_evento(evento, path, checkouts=cache) == "a@b.c"
+    assert cache.url("a@b.c") == "https://checkout/a@b.c/2"
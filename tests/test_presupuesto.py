@@ -0,0 +1,25 @@
+# test_presupuesto.py - Totales por deltas del LibroPresupuesto
+import math
+
+import pytest
+
+from presupuesto import LibroPresupuesto
+
+
+def test_totales_por_deltas():
+    libro = LibroPresupuesto([("Casa", ""), ("Auto", "")], campos=("valor", "deuda"))
+    libro.actualizar("Casa", "valor", 100000.10)
+    libro.actualizar("Casa", "deuda", 40000)
+    libro.actualizar("Auto", "valor", 0.2)
+    assert libro.totales() == {"valor": 100000.3, "deuda": 40000.0, "neto": 60000.3}
+    assert not libro.actualizar("Auto", "valor", 0.2)
+
+
+@pytest.mark.parametrize("monto", [math.inf, -math.inf, math.nan])
+def test_rechaza_montos_no_finitos(monto):
+    libro = LibroPresupuesto([("Casa", "")])
+    libro.actualizar("Casa", "valor", 500)
+    with pytest.raises(ValueError):
+        libro.actualizar("Casa", "valor", monto)
+    assert libro.monto("Casa") == 500.0
+    assert libro.total() == 500.0